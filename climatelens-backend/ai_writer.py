@@ -1,7 +1,10 @@
 import logging
 import json
 import os
-from groq import Groq
+import asyncio
+from llm_client import LLMClient, get_llm_client
+from narrative_cache import NarrativeCache, narrative_key, prompt_version
+from json_stream import StreamingJSONParser
 
 logging.basicConfig(level=logging.INFO)
 
@@ -103,77 +106,100 @@ Key Data:
 **CRITICAL:** Output must be a single valid JSON object strictly following the schema above, with no extra text, no URLs, and no deviations.
 """
 
-class AIWriter:
-    def __init__(self, groq_api_key: str = None):
-        self.client = Groq(api_key=groq_api_key or os.environ.get("GROQ_API_KEY"))
+REQUIRED_SECTIONS = ["executive_summary", "market_analysis", "climate_and_esg_risks", "final_verdict"]
+NARRATIVE_MAX_ATTEMPTS = int(os.getenv("NARRATIVE_MAX_ATTEMPTS", "2"))
+
+def _validate_section(sec, section):
+    """Schema check for one top-level section, run as soon as it is streamed."""
+    if sec not in REQUIRED_SECTIONS:
+        return
+    if not isinstance(section, dict) or "title" not in section or "subsections" not in section:
+        raise ValueError(f"Section '{sec}' missing 'title' or 'subsections'")
+    if not isinstance(section["subsections"], list):
+        raise ValueError(f"Section '{sec}' has non-list 'subsections'")
+    for sub in section["subsections"]:
+        if not isinstance(sub, dict) or "subtitle" not in sub or "paragraphs" not in sub:
+            raise ValueError(f"A subsection in '{sec}' is missing 'subtitle' or 'paragraphs'")
+
+NARRATIVE_CACHE_ENABLED = os.getenv("NARRATIVE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_narrative_cache = None
+
+def get_narrative_cache() -> NarrativeCache:
+    global _narrative_cache
+    if _narrative_cache is None:
+        _narrative_cache = NarrativeCache(prompt_version(SYSTEM_PROMPT))
+    return _narrative_cache
 
-    def _call_groq(self, prompt: str) -> str:
-        logging.info("Calling Groq API...")
+class AIWriter:
+    def __init__(self, llm: LLMClient = None, cache: NarrativeCache = None):
+        # The LLM client and its connection pool are shared across reports
+        self.llm = llm or get_llm_client()
+        self.cache = cache or (get_narrative_cache() if NARRATIVE_CACHE_ENABLED else None)
+        self.last_result = None
+
+    async def _call_groq(self, prompt: str) -> dict:
+        """
+        Stream the completion into an incremental JSON parser. Each section is
+        validated as soon as it completes, so a schema violation aborts the
+        generation instead of waiting for the full output.
+        """
+        logging.info("Calling Groq API (streaming)...")
+        parser = StreamingJSONParser(on_member=_validate_section)
         try:
-            response = self.client.chat.completions.create(
-                model=DEFAULT_MODEL,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
+            self.last_result = await self.llm.stream_complete(
+                prompt, model=DEFAULT_MODEL, on_delta=parser.feed, temperature=0.1
             )
-            output_text = response.choices[0].message.content.strip()
-            
-            # Handle Groq's thinking tags
-            if '<think>' in output_text and '</think>' in output_text:
-                # Extract content after </think>
-                think_end = output_text.find('</think>')
-                output_text = output_text[think_end + 8:].strip()
-            
-            # Find the JSON object (starts with { and ends with })
-            start_idx = output_text.find('{')
-            if start_idx != -1:
-                # Find the matching closing brace
-                brace_count = 0
-                end_idx = -1
-                for i in range(start_idx, len(output_text)):
-                    if output_text[i] == '{':
-                        brace_count += 1
-                    elif output_text[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end_idx = i
-                            break
-                if end_idx != -1:
-                    output_text = output_text[start_idx:end_idx + 1]
-            
-            logging.info("Groq response received.")
-            return output_text.strip()
+        except ValueError as e:
+            logging.error(f"Groq output rejected mid-stream: {e}")
+            raise
         except Exception as e:
             logging.error(f"Groq API call failed: {e}")
             raise
 
-    def generate_sections(self, lat, lon, address, risk_score, flood_zone, wildfire_now, **kwargs) -> dict:
+        try:
+            parsed_json = parser.result()
+        except ValueError as e:
+            logging.error(f"Failed to parse JSON: {e}\nRaw output:\n{self.last_result.text}")
+            raise ValueError("Groq returned invalid JSON") from e
+        for sec in REQUIRED_SECTIONS:
+            if sec not in parsed_json:
+                raise ValueError(f"Missing required top-level section: {sec}")
+        logging.info("Groq response received.")
+        return parsed_json
+
+    async def generate_sections(self, lat, lon, address, risk_score, flood_zone, wildfire_now, **kwargs) -> dict:
+      if self.cache is None:
+          return await self._generate(lat, lon, address, risk_score, flood_zone, wildfire_now, **kwargs)
+
+      charts = [c for c in AVAILABLE_CHARTS if kwargs.get(c)]
+      key = narrative_key(DEFAULT_MODEL, lat, lon, address, risk_score, flood_zone, wildfire_now, charts)
+      cached = await asyncio.to_thread(self.cache.get, key)
+      if cached is not None:
+          logging.info("Narrative cache hit, skipping Groq call.")
+          return cached
+
+      narrative = await self._generate(lat, lon, address, risk_score, flood_zone, wildfire_now, **kwargs)
+      await asyncio.to_thread(self.cache.put, key, narrative)
+      return narrative
+
+    async def _generate(self, lat, lon, address, risk_score, flood_zone, wildfire_now, **kwargs) -> dict:
       prompt = _build_prompt(lat, lon, address, risk_score, flood_zone, wildfire_now, **kwargs)
-      raw_output = self._call_groq(prompt)
-
-      try:
-          parsed_json = json.loads(raw_output)
-          logging.info("Groq JSON parsed successfully.")
-      except json.JSONDecodeError as e:
-          logging.error(f"Failed to parse JSON: {e}\nRaw output:\n{raw_output}")
-          raise ValueError("Groq returned invalid JSON") from e
-
-      # Validate top-level sections and subsections
-      required_sections = ["executive_summary", "market_analysis", "climate_and_esg_risks", "final_verdict"]
-      for sec in required_sections:
-          if sec not in parsed_json:
-              raise ValueError(f"Missing required top-level section: {sec}")
-          if "title" not in parsed_json[sec] or "subsections" not in parsed_json[sec]:
-              raise ValueError(f"Section '{sec}' missing 'title' or 'subsections'")
+
+      # Schema failures surface early while streaming, so a retry is cheap
+      for attempt in range(1, NARRATIVE_MAX_ATTEMPTS + 1):
+          try:
+              parsed_json = await self._call_groq(prompt)
+              break
+          except ValueError as e:
+              if attempt == NARRATIVE_MAX_ATTEMPTS:
+                  raise
+              logging.warning(f"Narrative attempt {attempt} failed validation, retrying: {e}")
 
       # Deduplicate charts globally across all subsections
       used_charts = set()
-      for sec in required_sections:
+      for sec in REQUIRED_SECTIONS:
           for sub in parsed_json[sec]["subsections"]:
-              if "subtitle" not in sub or "paragraphs" not in sub:
-                  raise ValueError(f"A subsection in '{sec}' is missing 'subtitle' or 'paragraphs'")
-              
               if "charts" in sub:
                   # Keep only allowed charts
                   sub["charts"] = [c for c in sub["charts"] if c in AVAILABLE_CHARTS]
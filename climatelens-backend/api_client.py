@@ -1,55 +1,202 @@
 import os
+import asyncio
+import logging
 import httpx
+import http_clients
+import metrics
+from response_cache import ResponseCache
+from singleflight import SingleFlight
+from spatial_index import SpatialIndex
+import daily_store
+from upstream_health import UpstreamHealth
 
-BASE = "https://api.envirotrust.eu"
+BASE = http_clients.UPSTREAMS["envirotrust"]
 
-async def _get(path, params=None, stream=False):
+# Query parameter the daily endpoints accept for "rows from this date on". Empty
+# means the API has no such filter: refreshes download the full history and
+# replace the stored series.
+DAILY_START_PARAM = os.getenv("ENVIROTRUST_DAILY_START_PARAM", "")
+
+# Per-endpoint timeout ceilings (seconds). The scenario/daily series are the largest payloads.
+# Once an endpoint has enough latency samples its timeout adapts below this (upstream_health).
+DEFAULT_TIMEOUT = float(os.getenv("ENVIROTRUST_TIMEOUT", "60"))
+ENDPOINT_TIMEOUTS = {
+    "/api/climate_risk/risk_score": 20.0,
+    "/api/flood/zone-current": 15.0,
+    "/api/wildfire/risk-current": 15.0,
+    "/api/airquality/timeseries-daily": 45.0,
+    "/api/airquality/timeseries-monthly": 45.0,
+    "/api/wildfire/timeseries": 45.0,
+    "/api/heat-wind/daily": DEFAULT_TIMEOUT,
+    "/api/heat-wind/timeseries": DEFAULT_TIMEOUT,
+}
+
+health = UpstreamHealth("envirotrust")
+
+def _counts_as_failure(exc) -> bool:
+    """Transport errors, timeouts, 429 and 5xx trip the circuit; other 4xx are valid answers."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, httpx.RequestError)
+
+async def _attempt(path, params, timeout):
     headers = {"x-api-key": os.getenv("ENVIROTRUST_API_KEY")}
-    url = f"{BASE}{path}"
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            r = await client.get(url, headers=headers, params=params, follow_redirects=True)
+    client = http_clients.get_client("envirotrust")
+    async with http_clients.limit("envirotrust"):
+        with metrics.upstream_call("envirotrust", path):
+            r = await client.get(path, headers=headers, params=params, timeout=timeout)
             r.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
+    return r
+
+async def _get(path, params=None, stream=False):
+    """
+    GET an EnviroTrust endpoint with an adaptive timeout, a hedged second
+    request once the call passes the endpoint's p95, and a circuit breaker
+    that fails fast (CircuitOpenError) while the endpoint keeps failing.
+    """
+    health.check(path)
+    timeout = health.timeout(path, ENDPOINT_TIMEOUTS.get(path, DEFAULT_TIMEOUT))
+    try:
+        r = await health.hedged(path, lambda: _attempt(path, params, timeout), timeouts=(httpx.TimeoutException,))
+    except httpx.RequestError as exc:
+        health.record_failure(path)
+        raise RuntimeError(f"An error occurred while requesting {exc.request.url!r}: {exc}")
+    except httpx.HTTPStatusError as exc:
+        if _counts_as_failure(exc):
+            health.record_failure(path)
+        else:
+            health.record_success(path)
+        raise RuntimeError(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}: {exc.response.text}")
+    except BaseException:
+        # Cancelled or unexpected: no verdict on the endpoint's health
+        health.breaker(path).release()
+        raise
+    health.record_success(path)
+
+    if stream:
+        return r
+
+    # Ensure JSON response
+    try:
+        return r.json()
+    except ValueError:
+        raise RuntimeError(f"EnviroTrust API returned non-JSON response: {r.text}")
+
 
-            if stream:
-                return r
+response_cache = ResponseCache()
+upstream_flight = SingleFlight("envirotrust")
+neighbour_index = SpatialIndex()
+
+async def _get_point(path, lat, lon, series=False):
+    """
+    GET a per-location endpoint through the response cache (exact location,
+    or a grid cell for gridded series) or, for coarse-resolution endpoints,
+    the nearest-neighbour index, which also serves exact repeats.
+    Concurrent misses for the same endpoint and cache key share one upstream call.
+    With `series`, the response is parsed once into a timeseries.TimeSeries
+    before it is cached.
+    """
+    # Coarse-resolution endpoints can be served from a nearby property's response
+    cache = neighbour_index if neighbour_index.eligible(path) else response_cache
+    cached = cache.get(path, lat, lon)
+    if cached is not None:
+        return cached
+
+    async def fetch():
+        data = await _get(path, {"latitude": lat, "longitude": lon})
+        if series:
+            # NumPy is only loaded by workers that fetch time series
+            import timeseries
+            data = timeseries.parse(path, data)
+        if cache is neighbour_index:
+            neighbour_index.put(path, lat, lon, data, response_cache.ttl_for(path))
+        else:
+            response_cache.put(path, lat, lon, data)
+        return data
+
+    return await upstream_flight.do((path, *response_cache.bucket(path, lat, lon)), fetch)
+
+
+_daily_refreshes = {}
+
+async def _get_daily(path, lat, lon):
+    """
+    GET a daily series through the persistent daily store, keyed by the
+    location quantized like the response cache's exact-location keys. A
+    series past its TTL is served as is while it is refreshed in the
+    background (stale-while-revalidate); with no usable stored series the
+    caller waits for the fetch.
+    """
+    location = response_cache.bucket(path, lat, lon)
+    ttl = response_cache.ttl_for(path)
+    stored = await asyncio.to_thread(lambda: daily_store.get_store().get(path, location, ttl))
+    if stored is not None:
+        series, fresh = stored
+        if not fresh:
+            _refresh_in_background(path, lat, lon, location, series)
+        return series
+    return await upstream_flight.do((path, *location), lambda: _refresh_daily(path, lat, lon, location, None))
+
+async def _refresh_daily(path, lat, lon, location, stored):
+    """
+    Fetch a daily series and store it. When the API takes a start date, only
+    the days from `stored`'s last date are fetched and merged into it;
+    otherwise the full fetched history replaces it.
+    """
+    import timeseries
+    params = {"latitude": lat, "longitude": lon}
+    since = stored.last_date if stored is not None and DAILY_START_PARAM else None
+    if since is not None:
+        # Inclusive, so a partial last day is replaced
+        params[DAILY_START_PARAM] = str(since)
+    fetched = timeseries.parse(path, await _get(path, params))
+    if not isinstance(fetched, timeseries.TimeSeries):
+        raise RuntimeError(f"EnviroTrust returned an unexpected {path} payload")
+    series = timeseries.merge(stored, fetched) if since is not None else fetched
+    await asyncio.to_thread(lambda: daily_store.get_store().put(path, location, series, delta=since is not None))
+    return series
+
+def _refresh_in_background(path, lat, lon, location, stored):
+    key = (path, *location)
+    if key in _daily_refreshes:
+        return
+
+    async def refresh():
+        try:
+            await upstream_flight.do(key, lambda: _refresh_daily(path, lat, lon, location, stored))
+        except Exception as e:
+            logging.warning(f"Background refresh of {path} failed; serving the stored series: {e}")
+        finally:
+            _daily_refreshes.pop(key, None)
 
-            # Ensure JSON response
-            try:
-                return r.json()
-            except ValueError:
-                raise RuntimeError(f"EnviroTrust API returned non-JSON response: {r.text}")
-        except httpx.RequestError as exc:
-            raise RuntimeError(f"An error occurred while requesting {exc.request.url!r}: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise RuntimeError(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}: {exc.response.text}")
+    _daily_refreshes[key] = asyncio.create_task(refresh())
 
 
 # 1) Composite risk (AQ, flood, wildfire)
 async def get_risk_score(lat: float, lon: float):
-    return await _get("/api/climate_risk/risk_score", {"latitude": lat, "longitude": lon})
+    return await _get_point("/api/climate_risk/risk_score", lat, lon)
 
 # 2) Air quality time-series (daily & monthly)
 async def get_air_quality_daily(lat: float, lon: float):
-    return await _get("/api/airquality/timeseries-daily", {"latitude": lat, "longitude": lon})
+    return await _get_daily("/api/airquality/timeseries-daily", lat, lon)
 
 async def get_air_quality_monthly(lat: float, lon: float):
-    return await _get("/api/airquality/timeseries-monthly", {"latitude": lat, "longitude": lon})
+    return await _get_point("/api/airquality/timeseries-monthly", lat, lon)
 
 # 3) Flood zone boolean
 async def get_flood_zone_current(lat: float, lon: float):
-    return await _get("/api/flood/zone-current", {"latitude": lat, "longitude": lon})
+    return await _get_point("/api/flood/zone-current", lat, lon)
 
 # 4) Wildfire current and timeseries
 async def get_wildfire_current(lat: float, lon: float):
-    return await _get("/api/wildfire/risk-current", {"latitude": lat, "longitude": lon})
+    return await _get_point("/api/wildfire/risk-current", lat, lon)
 
 async def get_wildfire_timeseries(lat: float, lon: float):
-    return await _get("/api/wildfire/timeseries", {"latitude": lat, "longitude": lon})
+    return await _get_point("/api/wildfire/timeseries", lat, lon, series=True)
 
 # 5) Heat/Wind: daily & climate scenarios time series
 async def get_heat_wind_daily(lat: float, lon: float):
-    return await _get("/api/heat-wind/daily", {"latitude": lat, "longitude": lon})
+    return await _get_daily("/api/heat-wind/daily", lat, lon)
 
 async def get_heat_wind_timeseries(lat: float, lon: float):
-    return await _get("/api/heat-wind/timeseries", {"latitude": lat, "longitude": lon})
+    return await _get_point("/api/heat-wind/timeseries", lat, lon, series=True)
@@ -0,0 +1,208 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import logging
+
+# Finished report PDFs are stored once per content hash on local disk, with a
+# per-address alias pointing at the latest one. Re-downloads, browser retries
+# and resumed (Range) downloads are served from the file instead of re-running
+# the report pipeline.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_DIR = os.getenv("REPORT_ARTIFACT_DIR", os.path.join(BASE_DIR, "report_artifacts"))
+MAX_BYTES = int(float(os.getenv("REPORT_ARTIFACT_MAX_MB", "512")) * 1024 * 1024)
+# A report is as fresh as its shortest-lived input (6h for current wildfire risk)
+REPORT_TTL = float(os.getenv("REPORT_ARTIFACT_TTL_HOURS", "6")) * 3600
+# Evicted files stay on disk this long, so downloads already streaming them can finish
+EVICTION_GRACE = float(os.getenv("REPORT_ARTIFACT_EVICTION_GRACE_SECONDS", "600"))
+
+
+class ArtifactStore:
+    """Content-addressed PDF store with size-bounded LRU eviction, shared by all workers on the host."""
+
+    def __init__(self, root: str = ARTIFACT_DIR, max_bytes: int = MAX_BYTES, ttl: float = REPORT_TTL,
+                 grace: float = EVICTION_GRACE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.grace = grace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), timeout=10.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 10000")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS artifacts (
+                        digest TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS reports (
+                        key TEXT PRIMARY KEY,
+                        digest TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS evicted (
+                        digest TEXT PRIMARY KEY,
+                        evicted_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (last_access)")
+        finally:
+            conn.close()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.pdf")
+
+    @staticmethod
+    def etag(digest: str) -> str:
+        """Strong ETag; the digest identifies the exact bytes."""
+        return f'"{digest}"'
+
+    def _artifact(self, digest: str, size: int) -> dict:
+        return {"digest": digest, "path": self.path(digest), "size": size, "etag": self.etag(digest)}
+
+    def lookup(self, key: str):
+        """Return the stored artifact for a report key, or None if missing or stale."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """
+                SELECT a.digest, a.size, r.created_at FROM reports AS r
+                JOIN artifacts AS a ON a.digest = r.digest WHERE r.key = ?
+                """,
+                (key,),
+            ).fetchone()
+            if row is None or time.time() - row["created_at"] > self.ttl or not os.path.exists(self.path(row["digest"])):
+                self.misses += 1
+                return None
+            with conn:
+                conn.execute("UPDATE artifacts SET last_access = ? WHERE digest = ?", (time.time(), row["digest"]))
+        finally:
+            conn.close()
+        self.hits += 1
+        return self._artifact(row["digest"], row["size"])
+
+    def put(self, key: str, data, alias: bool = True) -> dict:
+        """
+        Store PDF bytes under their content hash and point `key` at them.
+        With alias=False the file is stored (so it can be served once) but
+        later lookups of `key` miss, e.g. for reports built with missing data.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique temp name: concurrent puts of the same PDF must not share one
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO artifacts (digest, size, created_at, last_access) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (digest) DO UPDATE SET last_access = excluded.last_access
+                    """,
+                    (digest, len(data), now, now),
+                )
+                # Stored again before its evicted file was reaped
+                conn.execute("DELETE FROM evicted WHERE digest = ?", (digest,))
+                if alias:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO reports (key, digest, created_at) VALUES (?, ?, ?)",
+                        (key, digest, now),
+                    )
+                self._evict(conn, keep=digest)
+                self._reap(conn)
+        finally:
+            conn.close()
+        return self._artifact(digest, len(data))
+
+    def _evict(self, conn: sqlite3.Connection, keep: str):
+        """
+        Drop least recently used artifacts until the store fits in max_bytes.
+        Their files are only deleted by _reap, once the grace period is over.
+        """
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT digest, size FROM artifacts WHERE digest != ? ORDER BY last_access", (keep,)
+        ).fetchall()
+        for row in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM artifacts WHERE digest = ?", (row["digest"],))
+            conn.execute("DELETE FROM reports WHERE digest = ?", (row["digest"],))
+            conn.execute(
+                "INSERT OR REPLACE INTO evicted (digest, evicted_at) VALUES (?, ?)", (row["digest"], time.time())
+            )
+            total -= row["size"]
+            self.evictions += 1
+            logging.info(f"Artifact store: evicted {row['digest'][:12]} ({row['size']} bytes).")
+
+    def _reap(self, conn: sqlite3.Connection):
+        """Delete the files of artifacts evicted more than `grace` seconds ago."""
+        rows = conn.execute(
+            "SELECT digest FROM evicted WHERE evicted_at < ?", (time.time() - self.grace,)
+        ).fetchall()
+        for row in rows:
+            try:
+                os.remove(self.path(row["digest"]))
+            except OSError:
+                pass
+            conn.execute("DELETE FROM evicted WHERE digest = ?", (row["digest"],))
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        finally:
+            conn.close()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "artifacts": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_store = None
+
+
+def get_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
@@ -0,0 +1,38 @@
+"""
+Offline benchmarks for the ClimateLens backend.
+
+EnviroTrust, OpenCage and Groq are replaced by local fakes (see `fakes.py`),
+so runs cost no API quota. Usage, from the backend directory:
+
+    python -m benchmarks micro                 # plot_*, safe_multi_cell, build_pdf
+    python -m benchmarks load --endpoint download --requests 50 --concurrency 10
+    python -m benchmarks startup               # import time and idle RSS per worker profile
+    python -m benchmarks serve --port 8001     # API on fake upstreams, for external load tools
+    python -m benchmarks compare OLD.json NEW.json
+"""
+import os
+import tempfile
+
+
+def isolate_state():
+    """
+    Point every on-disk cache and queue at a fresh temp directory, so runs
+    start cold and never touch the real ones. Must run before the app
+    modules are imported (they read these paths at import time).
+    """
+    root = tempfile.mkdtemp(prefix="climatelens-bench-")
+    defaults = {
+        "GEOCODE_CACHE_PATH": os.path.join(root, "geocode.sqlite3"),
+        "NARRATIVE_CACHE_PATH": os.path.join(root, "narrative.sqlite3"),
+        "REPORT_QUEUE_PATH": os.path.join(root, "jobs.sqlite3"),
+        "REPORT_RESULTS_DIR": os.path.join(root, "results"),
+        "REPORT_ARTIFACT_DIR": os.path.join(root, "artifacts"),
+        "DAILY_STORE_PATH": os.path.join(root, "daily.sqlite3"),
+        "REPORT_WORKERS": "0",
+        "GROQ_API_KEY": "benchmark",
+        "ENVIROTRUST_API_KEY": "benchmark",
+        "OPENCAGE_API_KEY": "benchmark",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    return root
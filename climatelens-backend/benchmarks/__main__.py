@@ -0,0 +1,127 @@
+import sys
+import asyncio
+import logging
+import argparse
+from benchmarks import isolate_state
+
+
+def _fake_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.15, help="Mean EnviroTrust/OpenCage latency (s)")
+    parser.add_argument("--llm-latency", type=float, default=4.0, help="Groq stream duration (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls that fail")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of EnviroTrust calls that are slow")
+    parser.add_argument("--tail-latency", type=float, default=5.0, help="Latency of those slow calls (s)")
+    parser.add_argument("--down", default="", help="Comma-separated EnviroTrust paths that always fail")
+
+
+def _fake_config(args):
+    from benchmarks.fakes import FakeConfig
+    return FakeConfig(
+        latency=args.latency, llm_latency=args.llm_latency, error_rate=args.error_rate,
+        tail_rate=args.tail_rate, tail_latency=args.tail_latency,
+        down=tuple(path for path in args.down.split(",") if path),
+    )
+
+
+def _quiet():
+    # services configures INFO logging at import; keep benchmark output readable
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    micro = sub.add_parser("micro", help="Chart, text layout and PDF micro-benchmarks")
+    micro.add_argument("--repeat", type=int, default=10)
+    micro.add_argument("--only", help="Run benchmarks whose name contains this string")
+    micro.add_argument("--output", help="Result file (default: benchmarks/results/...)")
+
+    load = sub.add_parser("load", help="Load test the HTTP endpoints")
+    load.add_argument("--endpoint", choices=("preview", "download", "batch"), default="preview")
+    load.add_argument("--requests", type=int, default=50)
+    load.add_argument("--concurrency", type=int, default=10)
+    load.add_argument("--addresses", type=int, default=25, help="Distinct addresses to cycle through")
+    load.add_argument("--url", help="Target a running server instead of the in-process app")
+    load.add_argument("--output", help="Result file (default: benchmarks/results/...)")
+    _fake_args(load)
+
+    startup = sub.add_parser("startup", help="Cold import time and idle RSS per worker profile")
+    startup.add_argument("--repeat", type=int, default=5)
+    startup.add_argument("--output", help="Result file (default: benchmarks/results/...)")
+
+    serve = sub.add_parser("serve", help="Run the API on fake upstreams")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8001)
+    _fake_args(serve)
+
+    compare = sub.add_parser("compare", help="Compare two result files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--metric", default="p50_ms")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        from benchmarks.results import compare as compare_results
+        compare_results(args.base, args.new, args.metric)
+        return
+
+    isolate_state()
+    from benchmarks import results
+
+    if args.command == "micro":
+        from benchmarks import micro as micro_benchmarks
+        _quiet()
+        data = micro_benchmarks.run(args.repeat, args.only)
+        data["peak_rss_mb"] = results.peak_rss_mb()
+        params = {"repeat": args.repeat, "only": args.only}
+    elif args.command == "load":
+        from benchmarks import load as load_benchmarks
+        _quiet()
+        data = asyncio.run(load_benchmarks.run(
+            args.endpoint, args.requests, args.concurrency, args.addresses, args.url, _fake_config(args)
+        ))
+        params = {key: getattr(args, key) for key in ("endpoint", "requests", "concurrency", "addresses", "url",
+                                                     "latency", "llm_latency", "error_rate",
+                                                     "tail_rate", "tail_latency", "down")}
+    elif args.command == "startup":
+        from benchmarks import startup as startup_benchmarks
+        data = startup_benchmarks.run(args.repeat)
+        data["peak_rss_mb"] = results.peak_rss_mb()
+        params = {"repeat": args.repeat}
+        for name, value in data.items():
+            if name.endswith("idle_rss_mb"):
+                print(f"{name:<42}mean {value['mean']:.0f} MB, max {value['max']:.0f} MB")
+            elif name.endswith("heavy_modules"):
+                print(f"{name:<42}{', '.join(value) or '-'}")
+    else:
+        _serve(args)
+        return
+
+    results.print_table(data)
+    print(f"peak RSS: {data['peak_rss_mb']['self']:.0f} MB (child processes: {data['peak_rss_mb']['children']:.0f} MB)")
+    print(f"saved: {results.save(args.command, params, data, args.output)}")
+
+
+def _serve(args):
+    import uvicorn
+    import main as app_module
+    from contextlib import asynccontextmanager
+    from benchmarks import fakes
+
+    startup = app_module.app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with startup(app):
+            fakes.install(_fake_config(args))
+            logging.warning("Serving on fake EnviroTrust/OpenCage/Groq upstreams.")
+            yield
+
+    app_module.app.router.lifespan_context = lifespan
+    uvicorn.run(app_module.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
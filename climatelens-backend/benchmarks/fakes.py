@@ -0,0 +1,275 @@
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import datetime
+from collections import Counter
+from dataclasses import dataclass
+import httpx
+import http_clients
+import llm_client
+from ai_writer import REQUIRED_SECTIONS, AVAILABLE_CHARTS, DEFAULT_MODEL
+
+# Local stand-ins for EnviroTrust, OpenCage and Groq, injected as httpx mock
+# transports so the real client code (pooling, caching, SDK stream parsing)
+# runs unchanged. Payload shapes and sizes follow the real APIs.
+
+
+@dataclass
+class FakeConfig:
+    latency: float = 0.15       # mean EnviroTrust/OpenCage latency (seconds)
+    jitter: float = 0.5         # +/- fraction of latency
+    llm_latency: float = 4.0    # total Groq stream duration (seconds)
+    llm_chunks: int = 60        # streamed deltas per completion
+    error_rate: float = 0.0     # fraction of upstream calls answered with 503
+    tail_rate: float = 0.0      # fraction of EnviroTrust calls that take `tail_latency` instead
+    tail_latency: float = 5.0   # latency of those slow calls (seconds)
+    down: tuple = ()            # EnviroTrust paths that always answer 503 (partial outage)
+    seed: int = 1
+
+
+CALLS = Counter()
+
+
+def _rng(*parts) -> random.Random:
+    """Deterministic per-location randomness, so repeated runs return the same payloads."""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _coords(request: httpx.Request) -> tuple:
+    lat = round(float(request.url.params.get("latitude", 0)), 2)
+    lon = round(float(request.url.params.get("longitude", 0)), 2)
+    return lat, lon
+
+
+def risk_score(lat, lon) -> dict:
+    rng = _rng("risk", lat, lon)
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "scores": {
+            "air_quality": round(rng.uniform(1, 9), 1),
+            "flood_risk": round(rng.uniform(0, 10), 1),
+            "wildfire_risk": round(rng.uniform(0, 10), 1),
+        },
+    }
+
+
+def flood_zone(lat, lon) -> dict:
+    rng = _rng("flood", lat, lon)
+    return {"latitude": lat, "longitude": lon, "flood_zone": rng.choice(["Low Risk", "Medium Risk", "High Risk"])}
+
+
+def wildfire_current(lat, lon) -> dict:
+    rng = _rng("wildfire-now", lat, lon)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {"fire_risk_class": rng.choice(["Very Low", "Low", "Medium", "High", "Very High"])},
+    }
+
+
+def wildfire_timeseries(lat, lon) -> dict:
+    rng = _rng("wildfire-ts", lat, lon)
+    data = {}
+    for year in range(1980, 2024):
+        trend = (year - 1980) / 44
+        data[str(year)] = {
+            "low": rng.randint(20, 60),
+            "medium": int(10 + 20 * trend + rng.randint(0, 10)),
+            "high": int(2 + 10 * trend + rng.randint(0, 5)),
+            "very_high": int(5 * trend + rng.randint(0, 3)),
+            "latitude": lat,
+            "longitude": lon,
+        }
+    return {"wildfire_risk_timeseries_data": data}
+
+
+def heat_wind_timeseries(lat, lon) -> dict:
+    rng = _rng("heat-wind-ts", lat, lon)
+    rows = []
+    for year in range(2006, 2101):
+        t = (year - 2006) / 94
+        rows.append({
+            "year": year,
+            "heatwaves_rcp45": round(5 + 15 * t + rng.uniform(-2, 2), 1),
+            "heatwaves_rcp85": round(5 + 30 * t + rng.uniform(-2, 2), 1),
+            "consecutive_dry_days_rcp45": round(20 + 10 * t + rng.uniform(-3, 3), 1),
+            "consecutive_dry_days_rcp85": round(20 + 20 * t + rng.uniform(-3, 3), 1),
+            "extreme_wind_speed_days_rcp45": round(3 + 2 * t + rng.uniform(-1, 1), 1),
+            "extreme_wind_speed_days_rcp85": round(3 + 4 * t + rng.uniform(-1, 1), 1),
+            "daily max temperature rcp45(K)": round(298 + 2 * t + rng.uniform(-1, 1), 2),
+            "daily max temperature rcp85(K)": round(298 + 4 * t + rng.uniform(-1, 1), 2),
+        })
+    return {"heat_wind_timeseries_data": rows}
+
+
+def heat_wind_daily(lat, lon, days: int = 365) -> dict:
+    rng = _rng("heat-wind-daily", lat, lon)
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    rows = []
+    for i in range(days):
+        day = start + datetime.timedelta(days=i)
+        season = math.sin(2 * math.pi * (day.timetuple().tm_yday - 80) / 365)
+        rows.append({
+            "date": day.isoformat(),
+            "year": day.year,
+            "wind_speed(m/s)": round(rng.uniform(1, 12), 2),
+            "precipitation(mm)": round(max(0.0, rng.gauss(1.5, 3)), 2),
+            "2m temperature(K)": round(283 + 10 * season + rng.uniform(-3, 3), 2),
+        })
+    return {"heat_wind_daily_data": rows}
+
+
+def air_quality_daily(lat, lon, days: int = 365) -> dict:
+    rng = _rng("aq-daily", lat, lon)
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    rows = []
+    for i in range(days):
+        pm25 = max(1.0, rng.gauss(14, 6))
+        rows.append({
+            "date": (start + datetime.timedelta(days=i)).isoformat(),
+            "air_quality_index": round(pm25 * 3.2, 1),
+            "pm2_5": round(pm25, 1),
+            "pm10": round(pm25 * 1.6, 1),
+            "no2": round(rng.uniform(5, 40), 1),
+            "o3": round(rng.uniform(20, 90), 1),
+        })
+    return {"air_quality_timeseries": rows}
+
+
+def air_quality_monthly(lat, lon) -> dict:
+    daily = air_quality_daily(lat, lon, days=730)["air_quality_timeseries"]
+    return {"air_quality_timeseries": daily[::30]}
+
+
+ENVIROTRUST_PAYLOADS = {
+    "/api/climate_risk/risk_score": risk_score,
+    "/api/flood/zone-current": flood_zone,
+    "/api/wildfire/risk-current": wildfire_current,
+    "/api/wildfire/timeseries": wildfire_timeseries,
+    "/api/heat-wind/timeseries": heat_wind_timeseries,
+    "/api/heat-wind/daily": heat_wind_daily,
+    "/api/airquality/timeseries-daily": air_quality_daily,
+    "/api/airquality/timeseries-monthly": air_quality_monthly,
+}
+
+DAILY_PAYLOAD_KEYS = {
+    "/api/heat-wind/daily": "heat_wind_daily_data",
+    "/api/airquality/timeseries-daily": "air_quality_timeseries",
+}
+
+
+def narrative_document(seed: str = "") -> str:
+    """A schema-valid narrative JSON of realistic length, preceded by a reasoning block."""
+    rng = _rng("narrative", seed)
+    words = ("climate risk property flood wildfire heat exposure resilience insurance valuation "
+             "adaptation portfolio scenario emissions drought wind market investors").split()
+
+    def paragraph():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(60, 110))).capitalize() + "."
+
+    charts = list(AVAILABLE_CHARTS)
+    sections = {}
+    for index, key in enumerate(REQUIRED_SECTIONS):
+        subsections = []
+        for n in range(2):
+            subsections.append({
+                "subtitle": f"{key.replace('_', ' ').title()} {n + 1}",
+                "paragraphs": [paragraph() for _ in range(3)],
+                "bullets": [paragraph()[:120] for _ in range(4)],
+                "charts": charts[index + n::4][:2],
+            })
+        sections[key] = {"title": key.replace("_", " ").title(), "subsections": subsections}
+    return "<think>" + paragraph() + "</think>\n" + json.dumps(sections)
+
+
+class FakeUpstreams:
+    """Mock transports for every upstream, with latency and error injection."""
+
+    def __init__(self, config: FakeConfig = None):
+        self.config = config or FakeConfig()
+        self._random = random.Random(self.config.seed)
+
+    async def _delay(self, base: float):
+        jitter = self.config.jitter
+        await asyncio.sleep(max(0.0, base * self._random.uniform(1 - jitter, 1 + jitter)))
+
+    def _fail(self) -> bool:
+        return self._random.random() < self.config.error_rate
+
+    async def envirotrust(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        CALLS[f"envirotrust {path}"] += 1
+        slow = self._random.random() < self.config.tail_rate
+        await self._delay(self.config.tail_latency if slow else self.config.latency)
+        if self._fail() or path in self.config.down:
+            return httpx.Response(503, text="Service temporarily unavailable")
+        make = ENVIROTRUST_PAYLOADS.get(path)
+        if make is None:
+            return httpx.Response(404, json={"detail": "Not found"})
+        payload = make(*_coords(request))
+        # Daily endpoints honour `start_date` (run the app with ENVIROTRUST_DAILY_START_PARAM=start_date)
+        start = request.url.params.get("start_date")
+        if start and path in DAILY_PAYLOAD_KEYS:
+            key = DAILY_PAYLOAD_KEYS[path]
+            payload[key] = [row for row in payload[key] if row["date"] >= start]
+        return httpx.Response(200, json=payload)
+
+    async def opencage(self, request: httpx.Request) -> httpx.Response:
+        CALLS["opencage"] += 1
+        await self._delay(self.config.latency)
+        if self._fail():
+            return httpx.Response(503, text="Service temporarily unavailable")
+        # Addresses land deterministically within ~20 km of central London
+        rng = _rng("geocode", request.url.params.get("q", ""))
+        lat, lng = 51.5 + rng.uniform(-0.2, 0.2), -0.12 + rng.uniform(-0.3, 0.3)
+        return httpx.Response(200, json={"results": [{"geometry": {"lat": lat, "lng": lng}, "confidence": 9}]})
+
+    async def groq(self, request: httpx.Request) -> httpx.Response:
+        CALLS["groq"] += 1
+        if self._fail():
+            return httpx.Response(500, json={"error": {"message": "Internal server error"}})
+        body = json.loads(request.content)
+        document = narrative_document(body["messages"][-1]["content"][-200:])
+        chunks = self.config.llm_chunks
+        created = int(time.time())
+
+        def event(delta: dict, finish=None, x_groq=None) -> bytes:
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model", DEFAULT_MODEL),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if x_groq:
+                chunk["x_groq"] = x_groq
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        async def stream():
+            step = math.ceil(len(document) / chunks)
+            for start in range(0, len(document), step):
+                await self._delay(self.config.llm_latency / chunks)
+                yield event({"content": document[start:start + step]})
+            usage = {"prompt_tokens": 1200, "completion_tokens": len(document) // 4,
+                     "total_tokens": 1200 + len(document) // 4}
+            yield event({}, finish="stop", x_groq={"id": "req_bench", "usage": usage})
+            yield b"data: [DONE]\n\n"
+
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=stream())
+
+
+def install(config: FakeConfig = None) -> FakeUpstreams:
+    """Point the shared EnviroTrust, OpenCage and Groq clients at local fakes."""
+    fakes = FakeUpstreams(config)
+    for name, handler in (("envirotrust", fakes.envirotrust), ("opencage", fakes.opencage)):
+        http_clients.set_client(name, httpx.AsyncClient(
+            base_url=http_clients.UPSTREAMS[name], transport=httpx.MockTransport(handler)
+        ))
+    groq_http = httpx.AsyncClient(transport=httpx.MockTransport(fakes.groq))
+    llm_client.set_llm_client(llm_client.LLMClient(api_key="benchmark", http_client=groq_http))
+    return fakes
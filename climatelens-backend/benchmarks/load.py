@@ -0,0 +1,80 @@
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+import httpx
+from benchmarks import fakes
+from benchmarks.results import summarize, peak_rss_mb
+
+ENDPOINTS = ("preview", "download", "batch")
+BATCH_SIZE = 20
+
+
+def address(n: int) -> str:
+    return f"{n} Benchmark Street, London"
+
+
+@asynccontextmanager
+async def _client(url: str, config: fakes.FakeConfig):
+    """HTTP client for an external server, or for the app in-process on fake upstreams."""
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+            yield client
+        return
+    import main
+    async with main.lifespan(main.app):
+        fakes.install(config)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            yield client
+
+
+async def _request(client: httpx.AsyncClient, endpoint: str, n: int, addresses: int):
+    if endpoint == "preview":
+        response = await client.post("/report/preview", json={"address": address(n % addresses)})
+        response.raise_for_status()
+    elif endpoint == "download":
+        response = await client.get("/report/download", params={"address": address(n % addresses)})
+        response.raise_for_status()
+    else:
+        batch = [address((n * BATCH_SIZE + i) % addresses) for i in range(BATCH_SIZE)]
+        async with client.stream("POST", "/portfolio/batch", json={"addresses": batch}) as response:
+            response.raise_for_status()
+            async for _ in response.aiter_lines():
+                pass
+
+
+async def run(endpoint: str = "preview", requests: int = 50, concurrency: int = 10, addresses: int = 25,
+              url: str = None, config: fakes.FakeConfig = None) -> dict:
+    """
+    Closed-loop load: `concurrency` clients issue `requests` requests in total,
+    cycling through `addresses` distinct addresses (so caches see repeats).
+    """
+    if endpoint not in ENDPOINTS:
+        raise ValueError(f"Unknown endpoint '{endpoint}', expected one of {ENDPOINTS}")
+    latencies, errors = [], []
+    counter = iter(range(requests))
+
+    async with _client(url, config or fakes.FakeConfig()) as client:
+        async def user():
+            for n in counter:
+                started = time.perf_counter()
+                try:
+                    await _request(client, endpoint, n, addresses)
+                    latencies.append(time.perf_counter() - started)
+                except Exception as e:
+                    errors.append(str(e))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    for message in sorted(set(errors))[:5]:
+        logging.warning(f"Request error: {message}")
+    result = {
+        f"load.{endpoint}": summarize(latencies, wall, errors=len(errors)),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if not url:
+        result["upstream_calls"] = dict(fakes.CALLS)
+    return result
@@ -0,0 +1,87 @@
+import json
+import time
+import logging
+import visualization
+import timeseries
+import services
+from report_template import get_template
+from chart_renderer import CHART_FUNCTIONS
+from benchmarks import fakes
+from benchmarks.results import summarize
+
+LAT, LON = 51.5, -0.12
+
+# Chart key -> EnviroTrust endpoint it is drawn from
+CHART_ENDPOINTS = {
+    "risk_bar": "/api/climate_risk/risk_score",
+    "wildfire_ts": "/api/wildfire/timeseries",
+    "heatwind_scen": "/api/heat-wind/timeseries",
+    "recent_daily": "/api/heat-wind/daily",
+    "aq_gauges": "/api/airquality/timeseries-daily",
+}
+
+
+def _time(func, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        func()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def _narrative() -> dict:
+    return json.loads(fakes.narrative_document().split("</think>", 1)[1])
+
+
+def _write_paragraphs(paragraphs: list):
+    pdf = get_template().new_document()
+    pdf.add_page()
+    pdf.set_font("DejaVu", "", 11)
+    for paragraph in paragraphs:
+        services.safe_multi_cell(pdf, paragraph, h=6)
+
+
+def run(repeat: int = 10, only: str = None) -> dict:
+    """Time each plot_* function, text layout and PDF assembly on realistic inputs."""
+    results = {}
+    raw = {key: fakes.ENVIROTRUST_PAYLOADS[path](LAT, LON) for key, path in CHART_ENDPOINTS.items()}
+    for key, path in CHART_ENDPOINTS.items():
+        name = f"timeseries.parse[{key}]"
+        if path in timeseries.ENDPOINT_FORMATS and not (only and only not in name):
+            results[name] = _time(lambda: timeseries.parse(path, raw[key]), repeat)
+    # Charts draw what api_client hands them: parsed series for time-series endpoints
+    payloads = {key: timeseries.parse(path, raw[key]) for key, path in CHART_ENDPOINTS.items()}
+
+    for key, func_name in CHART_FUNCTIONS.items():
+        name = f"visualization.{func_name}"
+        if only and only not in name:
+            continue
+        plot = getattr(visualization, func_name)
+        results[name] = _time(lambda: plot(payloads[key]), repeat)
+        logging.warning(f"{name}: p50 {results[name]['p50_ms']:.1f} ms")
+
+    narrative = _narrative()
+    paragraphs = [p for section in narrative.values() for sub in section["subsections"] for p in sub["paragraphs"]]
+    charts = {key: getattr(visualization, CHART_FUNCTIONS[key])(payloads[key]) for key in CHART_ENDPOINTS}
+    risk = payloads["risk_bar"]
+    overall = sum(risk["scores"].values()) / len(risk["scores"])
+
+    cases = {
+        "services.safe_multi_cell": lambda: _write_paragraphs(paragraphs),
+        "services.build_pdf": lambda: services.build_pdf(LAT, LON, "1 Benchmark Street", overall, [], charts, narrative),
+        "services.build_pdf[no_charts]": lambda: services.build_pdf(LAT, LON, "1 Benchmark Street", overall, [], {}, narrative),
+    }
+    get_template()
+    for name, func in cases.items():
+        if only and only not in name:
+            continue
+        results[name] = _time(func, repeat)
+        logging.warning(f"{name}: p50 {results[name]['p50_ms']:.1f} ms")
+
+    pdf_bytes = services.build_pdf(LAT, LON, "1 Benchmark Street", overall, [], charts, narrative)
+    results["pdf_size"] = {"bytes": len(pdf_bytes), "paragraphs": len(paragraphs)}
+    return results
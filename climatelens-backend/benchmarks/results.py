@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import subprocess
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(values: list, p: float) -> float:
+    """Linear-interpolated percentile (p in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: list, wall_seconds: float = None, errors: int = 0) -> dict:
+    """Latency percentiles in milliseconds, plus throughput when the wall time is known."""
+    summary = {
+        "count": len(latencies),
+        "errors": errors,
+        "mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "max_ms": 1000 * max(latencies) if latencies else 0.0,
+    }
+    if wall_seconds:
+        summary["throughput_per_s"] = len(latencies) / wall_seconds
+    return summary
+
+
+def peak_rss_mb() -> dict:
+    """Peak resident set size of this process and of its reaped children (chart workers)."""
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def save(kind: str, params: dict, results: dict, path: str = None) -> str:
+    """Write one run as JSON: {kind, environment, params, results: {name: summary}}."""
+    env = environment()
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{env['commit'][:7] or 'nogit'}-{kind}.json")
+    with open(path, "w") as f:
+        json.dump({"kind": kind, "environment": env, "params": params, "results": results}, f, indent=2)
+    return path
+
+
+def print_table(results: dict):
+    print(f"{'benchmark':<42}{'n':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'ops/s':>10}{'err':>6}")
+    for name, r in results.items():
+        if "p50_ms" not in r:
+            continue
+        ops = r.get("throughput_per_s")
+        print(
+            f"{name:<42}{r['count']:>6}{r['p50_ms']:>11.1f}{r['p95_ms']:>11.1f}{r['p99_ms']:>11.1f}"
+            f"{(f'{ops:.1f}' if ops is not None else '-'):>10}{r.get('errors', 0):>6}"
+        )
+
+
+def compare(base_path: str, new_path: str, metric: str = "p50_ms"):
+    """Print `metric` for every benchmark in two result files and the relative change."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"base: {base['environment']['commit'][:10]}  {base['environment']['timestamp']}")
+    print(f"new:  {new['environment']['commit'][:10]}  {new['environment']['timestamp']}")
+    print(f"{'benchmark':<42}{'base':>12}{'new':>12}{'change':>10}")
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        old_value = base["results"].get(name, {}).get(metric)
+        new_value = new["results"].get(name, {}).get(metric)
+        if old_value is None and new_value is None:
+            continue
+        if old_value is None or new_value is None:
+            old_text = "-" if old_value is None else f"{old_value:.2f}"
+            new_text = "-" if new_value is None else f"{new_value:.2f}"
+            print(f"{name:<42}{old_text:>12}{new_text:>12}{'-':>10}")
+            continue
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        print(f"{name:<42}{old_value:>12.2f}{new_value:>12.2f}{change:>+9.1f}%")
@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+import subprocess
+from benchmarks.results import summarize
+
+HEAVY_MODULES = ("matplotlib", "numpy", "fpdf", "fontTools", "PIL", "groq")
+
+# Runs in a fresh interpreter: time `import main`, run the app's startup
+# (warming the report stack synchronously for full workers) and report RSS.
+_PROBE = r"""
+import sys, time, json, asyncio
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+async def startup():
+    started = time.perf_counter()
+    async with main.lifespan(main.app):
+        ready = time.perf_counter() - started
+        await asyncio.sleep(0.5)
+        return ready, rss_mb()
+
+startup_seconds, idle_rss = asyncio.run(startup())
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "startup_seconds": startup_seconds,
+    "idle_rss_mb": idle_rss,
+    "heavy_modules": sorted(m for m in HEAVY_MODULES if m in sys.modules),
+}))
+"""
+
+
+def _probe(profile: str) -> dict:
+    env = dict(os.environ, WORKER_PROFILE=profile, REPORT_WARMUP="startup", REPORT_WORKERS="0")
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n" + _PROBE
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(repeat: int = 5, profiles=("preview", "full")) -> dict:
+    """Cold import time, startup time and idle RSS per worker profile, each in a fresh process."""
+    results = {}
+    for profile in profiles:
+        probes = [_probe(profile) for _ in range(repeat)]
+        results[f"startup.{profile}.import"] = summarize([p["import_seconds"] for p in probes])
+        results[f"startup.{profile}.lifespan"] = summarize([p["startup_seconds"] for p in probes])
+        rss = [p["idle_rss_mb"] for p in probes]
+        results[f"startup.{profile}.idle_rss_mb"] = {"mean": sum(rss) / len(rss), "max": max(rss)}
+        results[f"startup.{profile}.heavy_modules"] = probes[-1]["heavy_modules"]
+    return results
@@ -0,0 +1,83 @@
+import numpy as np
+from timeseries import from_payload
+
+# Turns EnviroTrust payloads into the handful of NumPy arrays each chart
+# draws: one x-axis array plus one float array per series. Time series arrive
+# as timeseries.TimeSeries from api_client; raw payloads are parsed here.
+# Missing or null values are NaN, which matplotlib leaves as gaps.
+
+RISK_LABELS = {"air_quality": "Air Quality", "flood_risk": "Flood", "wildfire_risk": "Wildfire"}
+
+# One of each heatwaves, consecutive dry days and extreme wind speed
+HEAT_WIND_SCENARIOS = (
+    "heatwaves_rcp45",
+    "consecutive_dry_days_rcp45",
+    "extreme_wind_speed_days_rcp45",
+)
+
+RECENT_DAILY_SKIP = ("year", "2m temperature(K)")
+RECENT_DAYS = 30
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _empty(dtype) -> tuple:
+    return np.empty(0, dtype=dtype), {}
+
+
+def _yearly(series):
+    """Drop rows whose year label was not numeric (timeseries parses those as -1)."""
+    keep = series.index >= 0
+    if keep.all():
+        return series
+    return type(series)(series.key, series.index[keep], {name: values[keep] for name, values in series.columns.items()})
+
+
+def risk_scores(risk_score) -> tuple:
+    """(labels, values) for the composite risk bar chart."""
+    scores = risk_score.get("scores", {}) if isinstance(risk_score, dict) else {}
+    values = np.array([_float(scores.get(key) or 0) for key in RISK_LABELS])
+    return list(RISK_LABELS.values()), np.nan_to_num(values)
+
+
+def air_quality_latest(aq_data) -> tuple:
+    """(labels, values) with the latest AQI and PM2.5 readings."""
+    series = from_payload("air_quality_timeseries", aq_data)
+    values = np.zeros(2)
+    if series is not None and len(series):
+        for i, name in enumerate(("air_quality_index", "pm2_5")):
+            if name in series:
+                values[i] = series[name][-1]
+    return ["AQI", "PM2.5"], np.nan_to_num(values)
+
+
+def wildfire_series(api_data) -> tuple:
+    """(years, {danger_level: days})."""
+    series = from_payload("wildfire_risk_timeseries_data", api_data)
+    series = _yearly(series) if series is not None else None
+    if series is None or not len(series):
+        return _empty(int)
+    return series.index, dict(series.columns)
+
+
+def heat_wind_scenarios(api_data) -> tuple:
+    """(years, {scenario: days}) for the plotted RCP 4.5 scenarios present in the payload."""
+    series = from_payload("heat_wind_timeseries_data", api_data)
+    series = _yearly(series) if series is not None else None
+    if series is None or not len(series):
+        return _empty(int)
+    return series.index, {name: series[name] for name in HEAT_WIND_SCENARIOS if name in series}
+
+
+def recent_daily(hw_daily, days: int = RECENT_DAYS) -> tuple:
+    """(dates as datetime64[D], {measurement: values}) for the last `days` days."""
+    series = from_payload("heat_wind_daily_data", hw_daily)
+    if series is None or not len(series):
+        return _empty("datetime64[D]")
+    recent = series.tail(days)
+    return recent.index, {name: values for name, values in recent.columns.items() if name not in RECENT_DAILY_SKIP}
@@ -0,0 +1,149 @@
+import os
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+# Chart key -> visualization function. Workers look functions up by name so
+# jobs stay picklable.
+CHART_FUNCTIONS = {
+    "risk_bar": "plot_risk_score_bar",
+    "wildfire_ts": "plot_wildfire_timeseries",
+    "heatwind_scen": "plot_heat_wind_scenarios",
+    "recent_daily": "plot_recent_daily_weather",
+    "aq_gauges": "plot_air_quality_gauges",
+}
+
+CHART_BACKEND = os.getenv("CHART_BACKEND", "process")
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(len(CHART_FUNCTIONS), os.cpu_count() or 1))))
+CHART_MP_START = os.getenv("CHART_MP_START", "spawn")
+
+
+def _warm_worker():
+    """Process initializer: import the plotting stack once per worker."""
+    import visualization  # noqa: F401
+
+
+def _ping():
+    return os.getpid()
+
+
+def _render_chart(func_name: str, data):
+    import visualization
+    return getattr(visualization, func_name)(data)
+
+
+class ChartRenderer(ABC):
+    """Runs visualization.plot_* calls on an executor, off the event loop."""
+
+    def __init__(self, workers: int = CHART_WORKERS):
+        self.workers = max(1, workers)
+        self._executor = None
+
+    @abstractmethod
+    def _create_executor(self) -> Executor:
+        """Executor the charts run on; subclasses pick processes or threads."""
+
+    async def startup(self):
+        if self._executor is None:
+            self._executor = self._create_executor()
+
+    async def shutdown(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def render(self, chart_key: str, data):
+        await self.startup()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _render_chart, CHART_FUNCTIONS[chart_key], data)
+
+    async def render_all(self, jobs: dict) -> dict:
+        """
+        Render {chart_key: api_data} concurrently.
+        Charts that fail are logged and left out of the result.
+        """
+        keys = list(jobs)
+        results = await asyncio.gather(
+            *(self.render(key, jobs[key]) for key in keys),
+            return_exceptions=True
+        )
+        charts = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                logging.error(f"Chart '{key}' failed to render: {result}")
+            else:
+                charts[key] = result
+        return charts
+
+
+class ProcessPoolChartRenderer(ChartRenderer):
+    """Default backend: pyplot's global state is not thread-safe, so each chart gets a process."""
+
+    def _create_executor(self) -> Executor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(CHART_MP_START),
+            initializer=_warm_worker,
+        )
+
+    async def startup(self):
+        if self._executor is not None:
+            return
+        await super().startup()
+        # Spawn every worker now so the first report doesn't pay for the imports
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)))
+        logging.info(f"Chart process pool ready ({len(set(pids))} warm workers).")
+
+
+class InlineChartRenderer(ChartRenderer):
+    """Single worker thread; charts are serialized but the event loop stays free."""
+
+    def _create_executor(self) -> Executor:
+        _warm_worker()
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart")
+
+
+RENDERER_BACKENDS = {
+    "process": ProcessPoolChartRenderer,
+    "inline": InlineChartRenderer,
+}
+
+_renderer = None
+
+
+def get_renderer() -> ChartRenderer:
+    global _renderer
+    if _renderer is None:
+        backend = RENDERER_BACKENDS.get(CHART_BACKEND)
+        if backend is None:
+            logging.warning(f"Unknown CHART_BACKEND '{CHART_BACKEND}', using 'process'")
+            backend = ProcessPoolChartRenderer
+        _renderer = backend()
+    return _renderer
+
+
+async def startup():
+    await get_renderer().startup()
+
+
+async def shutdown():
+    global _renderer
+    if _renderer is not None:
+        await _renderer.shutdown()
+        _renderer = None
+
+
+async def render_charts(jobs: dict) -> dict:
+    return await get_renderer().render_all(jobs)
+
+
+async def render_chart(chart_key: str, data):
+    """Render one chart; returns None (and logs) if it fails."""
+    try:
+        return await get_renderer().render(chart_key, data)
+    except Exception as e:
+        logging.error(f"Chart '{chart_key}' failed to render: {e}")
+        return None
@@ -0,0 +1,162 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+
+# Daily EnviroTrust series (heat/wind, air quality) are long histories where
+# only the newest days change. They are kept per endpoint and location in a
+# SQLite store shared by all workers; when the API takes a start date, a
+# refresh only has to add the days after the last stored one.
+STORE_PATH = os.getenv(
+    "DAILY_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "daily_series.sqlite3"),
+)
+# How long past its TTL a stored series is still served while it is refreshed in the background
+MAX_STALE = float(os.getenv("DAILY_STORE_MAX_STALE_HOURS", "72")) * 3600
+LRU_SIZE = int(os.getenv("DAILY_STORE_LRU_SIZE", "1024"))
+
+
+class DailySeriesStore:
+    """
+    In-memory LRU in front of a SQLite table of serialized timeseries.TimeSeries.
+    Blocking; call it through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str = STORE_PATH, max_stale: float = MAX_STALE, lru_size: int = LRU_SIZE):
+        self.path = path
+        self.max_stale = max_stale
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()  # the LRU is used from asyncio.to_thread workers
+        self._hits = defaultdict(int)
+        self._stale = defaultdict(int)
+        self._misses = defaultdict(int)
+        self._delta_fetches = defaultdict(int)
+        self._full_fetches = defaultdict(int)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA busy_timeout = 10000")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode = WAL")
+                # Earlier versions shared one series per ~1 km cell; those rows cannot be mapped to a location
+                conn.execute("DROP TABLE IF EXISTS daily_series")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS daily_location_series (
+                        path TEXT NOT NULL,
+                        lat_key INTEGER NOT NULL,
+                        lon_key INTEGER NOT NULL,
+                        series BLOB NOT NULL,
+                        fetched_at REAL NOT NULL,
+                        PRIMARY KEY (path, lat_key, lon_key)
+                    )
+                    """
+                )
+        finally:
+            conn.close()
+
+    def _remember(self, key: tuple, entry: tuple):
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _db_get(self, key: tuple):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT series, fetched_at FROM daily_location_series WHERE path = ? AND lat_key = ? AND lon_key = ?",
+                key,
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        import timeseries
+        return timeseries.TimeSeries.from_bytes(row[0]), row[1]
+
+    def get(self, path: str, location: tuple, ttl: float):
+        """
+        Return (series, fresh) for a stored series that is at most `max_stale`
+        past `ttl`, or None. `location` is the quantized (lat, lon) key.
+        """
+        key = (path, *location)
+        with self._lock:
+            entry = self._lru.get(key)
+        if entry is None or time.time() - entry[1] > ttl:
+            # Another worker may have refreshed it since
+            stored = self._db_get(key)
+            if stored is not None and (entry is None or stored[1] > entry[1]):
+                entry = stored
+        age = time.time() - entry[1] if entry is not None else None
+        if entry is None or age > ttl + self.max_stale:
+            self._misses[path] += 1
+            return None
+        self._remember(key, entry)
+        if age > ttl:
+            self._stale[path] += 1
+            return entry[0], False
+        self._hits[path] += 1
+        return entry[0], True
+
+    def put(self, path: str, location: tuple, series, delta: bool = False):
+        key = (path, *location)
+        entry = (series, time.time())
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO daily_location_series (path, lat_key, lon_key, series, fetched_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (*key, series.to_bytes(), entry[1]),
+                )
+        finally:
+            conn.close()
+        self._remember(key, entry)
+        if delta:
+            self._delta_fetches[path] += 1
+        else:
+            self._full_fetches[path] += 1
+        logging.info(f"Daily store: {'delta' if delta else 'full'} refresh of {path} {location}, {len(series)} days up to {series.last_date}.")
+
+    def stats(self) -> dict:
+        """Hit (fresh), stale, miss and refresh counters, in total and per endpoint."""
+        counters = {
+            "hits": self._hits,
+            "stale_hits": self._stale,
+            "misses": self._misses,
+            "delta_fetches": self._delta_fetches,
+            "full_fetches": self._full_fetches,
+        }
+        endpoints = sorted(set().union(*counters.values()))
+        return {
+            "entries": len(self._lru),
+            **{name: sum(counter.values()) for name, counter in counters.items()},
+            "endpoints": {
+                path: {name: counter[path] for name, counter in counters.items()} for path in endpoints
+            },
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> DailySeriesStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DailySeriesStore()
+    return _store
@@ -0,0 +1,193 @@
+import os
+import re
+import csv
+import sys
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+# Two-tier geocoding cache: in-process LRU in front of a SQLite store that
+# survives restarts and is shared by all uvicorn workers on the host.
+CACHE_PATH = os.getenv(
+    "GEOCODE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "geocode_cache.sqlite3"),
+)
+CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL_DAYS", "90")) * 86400
+LRU_SIZE = int(os.getenv("GEOCODE_LRU_SIZE", "2048"))
+
+# Common street-address words mapped to their abbreviated form. "Saint" is
+# left as is: its usual abbreviation "st" would merge it with "street".
+ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "road": "rd", "boulevard": "blvd",
+    "drive": "dr", "lane": "ln", "court": "ct", "place": "pl",
+    "square": "sq", "terrace": "ter", "highway": "hwy", "parkway": "pkwy",
+    "circle": "cir", "crescent": "cres", "apartment": "apt", "suite": "ste",
+    "floor": "fl", "building": "bldg", "mount": "mt",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_address(address: str) -> str:
+    """Canonical form of an address: lowercase, no punctuation, abbreviated street words."""
+    if not address:
+        return ""
+    text = _PUNCTUATION.sub(" ", address.lower())
+    words = _WHITESPACE.split(text.strip())
+    return " ".join(ABBREVIATIONS.get(w, w) for w in words if w)
+
+
+class GeocodeCache:
+    """Blocking; the async `geocode` runs lookups and stores through asyncio.to_thread."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL, lru_size: int = LRU_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()  # the LRU is used from asyncio.to_thread workers
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA busy_timeout = 10000")
+        return conn
+
+    def _init_db(self):
+        with self._connect() as conn:
+            # WAL lets several worker processes read while one writes
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocode (
+                    address TEXT PRIMARY KEY,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+        conn.close()
+
+    # --- In-process LRU ---
+    def _lru_get(self, key: str):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            coords, stored_at = entry
+            if time.time() - stored_at > self.ttl:
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            return coords
+
+    def _lru_put(self, key: str, coords: dict, stored_at: float):
+        with self._lock:
+            self._lru[key] = (coords, stored_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    # --- SQLite store ---
+    def _db_get(self, key: str):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT lat, lon, updated_at FROM geocode WHERE address = ?", (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or time.time() - row[2] > self.ttl:
+            return None
+        return {"lat": row[0], "lon": row[1]}, row[2]
+
+    def _db_put_many(self, rows: list):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO geocode (address, lat, lon, updated_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+        finally:
+            conn.close()
+
+    # --- Public API ---
+    def get(self, address: str):
+        """Return cached coordinates for an address, or None."""
+        key = normalize_address(address)
+        coords = self._lru_get(key)
+        if coords is not None:
+            return coords
+        hit = self._db_get(key)
+        if hit is None:
+            return None
+        coords, stored_at = hit
+        self._lru_put(key, coords, stored_at)
+        return coords
+
+    def put(self, address: str, coords: dict):
+        key = normalize_address(address)
+        now = time.time()
+        self._db_put_many([(key, coords["lat"], coords["lon"], now)])
+        self._lru_put(key, coords, now)
+
+    def preload_from_csv(self, csv_path: str) -> int:
+        """
+        Bulk-load coordinates from a CSV with `address`, `lat` and `lon` columns.
+        Returns the number of rows stored.
+        """
+        now = time.time()
+        rows = {}
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                try:
+                    key = normalize_address(record["address"])
+                    lat, lon = float(record["lat"]), float(record["lon"])
+                except (KeyError, TypeError, ValueError) as e:
+                    logging.warning(f"Skipping invalid geocode row {record}: {e}")
+                    continue
+                if key:
+                    rows[key] = (key, lat, lon, now)
+        self._db_put_many(list(rows.values()))
+        logging.info(f"Preloaded {len(rows)} geocoded addresses from {csv_path}")
+        return len(rows)
+
+    async def geocode(self, address: str, fetch) -> dict:
+        """Return coordinates from the cache, falling back to `await fetch(address)`."""
+        coords = await asyncio.to_thread(self.get, address)
+        if coords is not None:
+            logging.info(f"Geocode cache hit: {address}")
+            return coords
+        coords = await fetch(address)
+        await asyncio.to_thread(self.put, address, coords)
+        return coords
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> GeocodeCache:
+    """The process-wide cache; its SQLite file is created on first use, not on import."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GeocodeCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    # Usage: python geocoding.py preload addresses.csv
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 3 or sys.argv[1] != "preload":
+        print("Usage: python geocoding.py preload <addresses.csv>")
+        sys.exit(1)
+    get_cache().preload_from_csv(sys.argv[2])
@@ -0,0 +1,106 @@
+import os
+import asyncio
+import logging
+import contextlib
+import httpx
+
+# One pooled client per upstream, created in the FastAPI lifespan hook.
+UPSTREAMS = {
+    "envirotrust": "https://api.envirotrust.eu",
+    "opencage": "https://api.opencagedata.com",
+}
+
+_clients = {}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        logging.warning(f"Invalid value for {name}, using default {default}")
+        return default
+
+
+# Max in-flight requests per upstream, across all callers in this process (0 = unlimited).
+# Keeps large portfolio batches from flooding an upstream or exhausting the pool.
+CONCURRENCY_LIMITS = {
+    "envirotrust": _env_int("ENVIROTRUST_MAX_CONCURRENCY", 16),
+    "opencage": _env_int("OPENCAGE_MAX_CONCURRENCY", 4),
+}
+_semaphores = {}
+
+
+def limit(name: str):
+    """Async context manager holding one of the upstream's concurrency slots."""
+    slots = CONCURRENCY_LIMITS.get(name, 0)
+    if slots <= 0:
+        return contextlib.nullcontext()
+    semaphore = _semaphores.get(name)
+    if semaphore is None:
+        semaphore = _semaphores[name] = asyncio.Semaphore(slots)
+    return semaphore
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_env_int("HTTP_MAX_CONNECTIONS", 50),
+        max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE", 20),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 is opt-in and needs the optional `h2` package."""
+    if os.getenv("HTTP2_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logging.warning("HTTP2_ENABLED is set but 'h2' is not installed, falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=UPSTREAMS[name],
+        limits=_limits(),
+        http2=_http2_enabled(),
+        timeout=httpx.Timeout(float(os.getenv("HTTP_DEFAULT_TIMEOUT", "60"))),
+        follow_redirects=True,
+    )
+
+
+async def startup():
+    """Create the shared clients. Called once from the app lifespan."""
+    for name in UPSTREAMS:
+        if name not in _clients:
+            _clients[name] = _create_client(name)
+    logging.info(f"HTTP clients ready: {', '.join(_clients)}")
+
+
+async def shutdown():
+    """Close all pooled connections."""
+    for name in list(_clients):
+        client = _clients.pop(name)
+        try:
+            await client.aclose()
+        except Exception as e:
+            logging.error(f"Error closing HTTP client '{name}': {e}")
+    logging.info("HTTP clients closed.")
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """
+    Return the pooled client for an upstream.
+    Created lazily when used outside the app lifespan (scripts, REPL).
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _create_client(name)
+    return client
+
+
+def set_client(name: str, client: httpx.AsyncClient):
+    """Replace an upstream's client, e.g. with a mock transport for benchmarks."""
+    _clients[name] = client
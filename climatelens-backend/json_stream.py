@@ -0,0 +1,153 @@
+import json
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for a single JSON object arriving in text chunks.
+
+    Text before the object (including a `<think>...</think>` reasoning block)
+    is skipped. Each top-level member is decoded as soon as it is complete and
+    passed to `on_member(key, value)`, which may raise to abort the stream.
+    Braces inside strings are handled correctly.
+    """
+
+    def __init__(self, on_member=None):
+        self.on_member = on_member
+        # Preamble text kept in case a tag or "{" is split across chunks
+        self.tail = ""
+        self.in_think = False
+        # Chunks of the object still needed to decode the current key or
+        # member; `base` is the object offset of chunks[0]. Appending chunks
+        # and dropping them once a member is decoded keeps feeding linear in
+        # the stream length.
+        self.chunks = []
+        self.base = 0
+        self.length = 0
+        self.started = False
+        self.end = None
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.key_start = None
+        self.key = None
+        self.value_start = None
+        self.members = {}
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    def feed(self, text: str):
+        if self.done or not text:
+            return
+        if not self.started:
+            text = self._skip_preamble(text)
+            if not text:
+                return
+        offset = self.length
+        self.chunks.append(text)
+        self.length += len(text)
+        self._scan(text, offset)
+
+    def _skip_preamble(self, text: str) -> str:
+        """Consume text before the object; returns the rest, starting at "{"."""
+        buf = self.tail + text
+        pos = 0
+        while True:
+            if self.in_think:
+                idx = buf.find(THINK_CLOSE, pos)
+                if idx == -1:
+                    # Keep a tail in case the closing tag is split across chunks
+                    self.tail = buf[max(pos, len(buf) - len(THINK_CLOSE)):]
+                    return ""
+                pos = idx + len(THINK_CLOSE)
+                self.in_think = False
+                continue
+            think_idx = buf.find(THINK_OPEN, pos)
+            brace_idx = buf.find("{", pos)
+            if think_idx != -1 and (brace_idx == -1 or think_idx < brace_idx):
+                self.in_think = True
+                pos = think_idx + len(THINK_OPEN)
+            elif brace_idx != -1:
+                self.started = True
+                self.tail = ""
+                return buf[brace_idx:]
+            else:
+                self.tail = buf[max(pos, len(buf) - len(THINK_OPEN)):]
+                return ""
+
+    def _text(self, start: int, end: int) -> str:
+        """Object text between two offsets, all within the retained chunks."""
+        if len(self.chunks) > 1:
+            self.chunks = ["".join(self.chunks)]
+        return self.chunks[0][start - self.base:end - self.base]
+
+    def _release(self, text: str, offset: int, i: int):
+        """Drop everything up to object offset `i`; it lies in the current chunk `text`."""
+        self.chunks = [text[i + 1 - offset:]]
+        self.base = i + 1
+
+    def _finish_member(self, end: int):
+        if self.key is None or self.value_start is None:
+            self.key = self.value_start = None
+            return
+        raw = self._text(self.value_start, end)
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in member '{self.key}': {e}") from e
+        key = self.key
+        self.key = self.value_start = None
+        self.members[key] = value
+        if self.on_member is not None:
+            self.on_member(key, value)
+
+    def _scan(self, text: str, offset: int):
+        for j, c in enumerate(text):
+            i = offset + j
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.key_start is not None:
+                        self.key = json.loads(self._text(self.key_start, i + 1))
+                        self.key_start = None
+                        self._release(text, offset, i)
+                continue
+
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1:
+                    if self.key is None:
+                        self.key_start = i
+                    elif self.value_start is None:
+                        self.value_start = i
+            elif c in "{[":
+                if self.depth == 1 and self.key is not None and self.value_start is None:
+                    self.value_start = i
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._finish_member(i)
+                    self.end = i
+                    self.chunks = []
+                    return
+            elif self.depth == 1:
+                if c == ",":
+                    self._finish_member(i)
+                    self._release(text, offset, i)
+                elif c != ":" and not c.isspace() and self.key is not None and self.value_start is None:
+                    self.value_start = i
+
+    def result(self) -> dict:
+        """The complete object. Raises ValueError if the stream ended early."""
+        if not self.done:
+            raise ValueError("JSON object incomplete or missing in LLM output")
+        return self.members
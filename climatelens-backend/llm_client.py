@@ -0,0 +1,236 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+import metrics
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+
+@dataclass
+class LLMResult:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    queued_seconds: float = 0.0
+    latency_seconds: float = 0.0
+    usage: dict = field(default_factory=dict)
+
+
+class FairLimiter:
+    """Concurrency limit whose waiters are admitted strictly in arrival order."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._active = 0
+        self._waiters = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w.done())
+
+    async def acquire(self):
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed to us just before cancellation; pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        # Hand the slot directly to the oldest live waiter
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class LLMClient:
+    """
+    Shared async Groq client. Calls go through a fair, global concurrency
+    limit; cancelling the awaiting task cancels the upstream HTTP request.
+    """
+
+    def __init__(self, api_key: str = None, max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT, http_client=None):
+        # Imported here so workers that never call the LLM don't load the SDK
+        from groq import AsyncGroq
+        self.client = AsyncGroq(
+            api_key=api_key or os.environ.get("GROQ_API_KEY"),
+            timeout=timeout,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=http_client,
+        )
+        self.timeout = timeout
+        self.limiter = FairLimiter(max_concurrency)
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    async def complete(self, prompt: str, model: str, temperature: float = 0.1, timeout: float = None) -> LLMResult:
+        queued_at = time.perf_counter()
+        async with self.limiter:
+            started_at = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                    ),
+                    timeout=timeout or self.timeout,
+                )
+            except Exception:
+                self.failures += 1
+                metrics.UPSTREAM_ERRORS.inc(upstream="groq", endpoint=model)
+                raise
+            finished_at = time.perf_counter()
+
+        usage = response.usage.model_dump() if getattr(response, "usage", None) else {}
+        text = response.choices[0].message.content or ""
+        return self._record(text, model, usage, queued_at, started_at, finished_at)
+
+    async def stream_complete(self, prompt: str, model: str, on_delta, temperature: float = 0.1, timeout: float = None) -> LLMResult:
+        """
+        Stream the completion, passing each text delta to `on_delta(text)`.
+        If `on_delta` raises, the upstream stream is closed and the error propagates.
+        """
+        queued_at = time.perf_counter()
+        async with self.limiter:
+            started_at = time.perf_counter()
+            try:
+                text, usage = await asyncio.wait_for(
+                    self._consume_stream(prompt, model, temperature, on_delta),
+                    timeout=timeout or self.timeout,
+                )
+            except Exception:
+                self.failures += 1
+                metrics.UPSTREAM_ERRORS.inc(upstream="groq", endpoint=model)
+                raise
+            finished_at = time.perf_counter()
+        return self._record(text, model, usage, queued_at, started_at, finished_at)
+
+    async def _consume_stream(self, prompt: str, model: str, temperature: float, on_delta):
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            stream=True,
+        )
+        parts = []
+        usage = {}
+        try:
+            async for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        on_delta(delta)
+                # Groq reports token usage on the final chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None):
+                    usage = x_groq.usage.model_dump()
+        finally:
+            await stream.close()
+        return "".join(parts), usage
+
+    def _record(self, text: str, model: str, usage: dict, queued_at: float, started_at: float, finished_at: float) -> LLMResult:
+        result = LLMResult(
+            text=text,
+            model=model,
+            prompt_tokens=usage.get("prompt_tokens") or 0,
+            completion_tokens=usage.get("completion_tokens") or 0,
+            total_tokens=usage.get("total_tokens") or 0,
+            queued_seconds=started_at - queued_at,
+            latency_seconds=finished_at - started_at,
+            usage=usage,
+        )
+        self.calls += 1
+        metrics.UPSTREAM_SECONDS.observe(result.latency_seconds, upstream="groq", endpoint=model)
+        metrics.LLM_QUEUE_SECONDS.observe(result.queued_seconds)
+        self.prompt_tokens += result.prompt_tokens
+        self.completion_tokens += result.completion_tokens
+        logging.info(
+            f"LLM call done: model={model} latency={result.latency_seconds:.2f}s "
+            f"queued={result.queued_seconds:.2f}s tokens={result.prompt_tokens}+{result.completion_tokens}"
+        )
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "in_flight": self.limiter.active,
+            "queued": self.limiter.queued,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+    async def close(self):
+        await self.client.close()
+
+
+_client = None
+
+
+def get_llm_client() -> LLMClient:
+    global _client
+    if _client is None:
+        _client = LLMClient()
+    return _client
+
+
+def set_llm_client(client: LLMClient):
+    """Replace the shared client, e.g. with one on a mock transport for benchmarks."""
+    global _client
+    _client = client
+
+
+def current_stats():
+    """Stats of the shared client, or None if it has not been created."""
+    return _client.stats() if _client is not None else None
+
+
+async def startup():
+    try:
+        get_llm_client()
+    except Exception as e:
+        # Preview/contact still work without an LLM; report downloads will retry on use
+        logging.warning(f"LLM client not initialised: {e}")
+
+
+async def shutdown():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
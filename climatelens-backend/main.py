@@ -1,15 +1,82 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, FileResponse, StreamingResponse
 from pydantic import BaseModel
-from services import fetch_climate_preview, generate_pdf_report_service
-from models import ClimatePreview
-import io
+from contextlib import asynccontextmanager
+import os
+import asyncio
+import metrics
+from services import fetch_climate_preview, generate_report
+from models import ClimatePreview, ReportJob
+import http_clients
+import api_client
+import services
+import chart_renderer
+import llm_client
+import report_jobs
+import artifact_store
+import daily_store
+import portfolio
+from geocoding import normalize_address
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="ClimateLens API")
+# ------------------- Lifespan -------------------
+# "full" workers serve everything. "preview" workers never load the chart,
+# PDF or LLM stack: report downloads not already in the artifact store are
+# refused with 503, and report jobs are queued for full workers to run.
+WORKER_PROFILE = os.getenv("WORKER_PROFILE", "full")
+# When full workers load the report stack: "background" (after startup, while
+# already serving), "startup" (before serving) or "lazy" (on first report).
+REPORT_WARMUP = os.getenv("REPORT_WARMUP", "background")
+
+def _serves_reports() -> bool:
+    return WORKER_PROFILE != "preview"
+
+def _require_report_stack():
+    if not _serves_reports():
+        raise HTTPException(status_code=503, detail="This worker only serves previews; try again or queue a report job")
+
+async def _warm_report_stack():
+    import report_template
+    try:
+        await chart_renderer.startup()
+        await asyncio.to_thread(report_template.get_template)
+        await llm_client.startup()
+        print("[STARTUP] Report stack warmed up")
+    except Exception as e:
+        # Everything warmed here is also created on first use
+        print(f"[STARTUP] Report stack warm-up failed, continuing lazily: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_clients.startup()
+    warmup = None
+    job_workers = None
+    if _serves_reports():
+        if REPORT_WARMUP == "startup":
+            await _warm_report_stack()
+        elif REPORT_WARMUP == "background":
+            warmup = asyncio.create_task(_warm_report_stack())
+        if report_jobs.REPORT_WORKERS > 0:
+            job_workers = report_jobs.ReportWorkerPool(report_jobs.get_queue())
+            await job_workers.start()
+    print(f"[STARTUP] Worker profile '{WORKER_PROFILE}' ready")
+    app.state.job_workers = job_workers
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+            await asyncio.gather(warmup, return_exceptions=True)
+        if job_workers is not None:
+            await job_workers.stop()
+        await llm_client.shutdown()
+        await chart_renderer.shutdown()
+        await http_clients.shutdown()
+
+app = FastAPI(title="ClimateLens API", lifespan=lifespan)
 
 # ------------------- Root Endpoint -------------------
 @app.get("/")
@@ -25,6 +92,8 @@ origins = [
     "http://127.0.0.1:8080",
 ]
 
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -37,6 +106,10 @@ app.add_middleware(
 class AddressRequest(BaseModel):
     address: str
 
+class ReportJobRequest(BaseModel):
+    address: str
+    priority: int = 0
+
 class ContactRequest(BaseModel):
     name: str
     email: str
@@ -57,24 +130,236 @@ async def get_preview(request: AddressRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 # ------------------- Download PDF -------------------
+async def _cancel_on_disconnect(request: Request, coro):
+    """Run `coro`, cancelling it (and any upstream LLM/API calls) if the client goes away."""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=1.0)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+def _etag_matches(if_none_match, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 @app.get("/report/download")
-async def download_report(address: str):
+async def download_report(address: str, request: Request):
     print(f"[DOWNLOAD] Starting download for address: {address}")
+    store = artifact_store.get_store()
+    key = normalize_address(address)
+    artifact = await asyncio.to_thread(store.lookup, key)
+    degraded = {}
+    if artifact is not None:
+        print(f"[DOWNLOAD] Serving stored report {artifact['digest'][:12]} for: {address}")
+    else:
+        _require_report_stack()
+        try:
+            report = await _cancel_on_disconnect(request, generate_report(address))
+            degraded = report["degraded"]
+            print(f"[DOWNLOAD] PDF generated successfully for: {address}")
+        except HTTPException:
+            print(f"[DOWNLOAD] Client disconnected, report cancelled for: {address}")
+            raise
+        except Exception as e:
+            print(f"[DOWNLOAD ERROR] Failed to generate PDF: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            # Catch *real* cause and forward it to frontend
+            raise HTTPException(status_code=500, detail=str(e))
+        if degraded:
+            print(f"[DOWNLOAD] Report is missing {', '.join(degraded)}; not kept for re-downloads")
+        # A degraded report is served once; the next download tries the upstreams again
+        artifact = await asyncio.to_thread(store.put, key, report["pdf"], not degraded)
+
+    # Clients revalidate with If-None-Match; Range/If-Range are handled by FileResponse
+    headers = {"ETag": artifact["etag"], "Cache-Control": "private, no-cache"}
+    if degraded:
+        headers["X-Report-Degraded"] = ",".join(degraded)
+    if _etag_matches(request.headers.get("if-none-match"), artifact["etag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        artifact["path"],
+        media_type="application/pdf",
+        filename=f"{address}_ClimateReport.pdf",
+        headers=headers,
+    )
+
+# ------------------- Portfolio Batch -------------------
+@app.post("/portfolio/batch")
+async def portfolio_batch(request: Request, pdfs: bool = False):
+    """
+    Assess a list of addresses (JSON or CSV body). Streams NDJSON preview
+    results as each property finishes, or with `pdfs=true` a ZIP of reports.
+    """
     try:
-        pdf_buffer = await generate_pdf_report_service(address)
-        print(f"[DOWNLOAD] PDF generated successfully for: {address}")
-    except Exception as e:
-        print(f"[DOWNLOAD ERROR] Failed to generate PDF: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        # Catch *real* cause and forward it to frontend
-        raise HTTPException(status_code=500, detail=str(e))
-    
-    headers = {
-        'Content-Disposition': f'attachment; filename="{address}_ClimateReport.pdf"'
+        addresses = portfolio.parse_addresses(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not addresses:
+        raise HTTPException(status_code=400, detail="No addresses provided")
+    print(f"[PORTFOLIO] Starting batch of {len(addresses)} addresses (pdfs={pdfs})")
+
+    if pdfs:
+        _require_report_stack()
+        headers = {"Content-Disposition": 'attachment; filename="ClimateLens_Portfolio.zip"'}
+        return StreamingResponse(portfolio.stream_zip(addresses), media_type="application/zip", headers=headers)
+    return StreamingResponse(portfolio.stream_ndjson(addresses), media_type="application/x-ndjson")
+
+# ------------------- Report Jobs -------------------
+def _job_response(job: dict, position=None) -> ReportJob:
+    return ReportJob(
+        jobId=job["id"],
+        address=job["address"],
+        status=job["status"],
+        priority=job["priority"],
+        queuePosition=position,
+        createdAt=job["created_at"],
+        startedAt=job["started_at"],
+        finishedAt=job["finished_at"],
+        error=job["error"],
+        downloadUrl=f"/report/jobs/{job['id']}/download" if job["status"] == report_jobs.DONE else None,
+    )
+
+@app.post("/report/jobs", response_model=ReportJob, status_code=202)
+async def submit_report_job(request: ReportJobRequest):
+    queue = report_jobs.get_queue()
+    job_id = await asyncio.to_thread(queue.submit, request.address, request.priority)
+    print(f"[JOB] Queued report job {job_id} for address: {request.address}")
+    if app.state.job_workers is not None:
+        app.state.job_workers.notify()
+    job = await asyncio.to_thread(queue.get, job_id)
+    position = await asyncio.to_thread(queue.position, job_id)
+    return _job_response(job, position)
+
+@app.get("/report/jobs/{job_id}", response_model=ReportJob)
+async def get_report_job(job_id: str, wait: float = 0):
+    """Job status. With `wait` (seconds, max 60) the call blocks until the job finishes or the wait expires."""
+    queue = report_jobs.get_queue()
+    if wait > 0:
+        job = await queue.wait(job_id, min(wait, 60.0))
+    else:
+        job = await asyncio.to_thread(queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    position = await asyncio.to_thread(queue.position, job_id) if job["status"] == report_jobs.QUEUED else None
+    return _job_response(job, position)
+
+@app.get("/report/jobs/{job_id}/download")
+async def download_report_job(job_id: str):
+    job = await asyncio.to_thread(report_jobs.get_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == report_jobs.FAILED:
+        raise HTTPException(status_code=500, detail=job["error"] or "Report generation failed")
+    if job["status"] != report_jobs.DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    if not os.path.exists(job["result_path"]):
+        raise HTTPException(status_code=404, detail="Report file no longer available; submit the job again")
+    return FileResponse(
+        job["result_path"],
+        media_type="application/pdf",
+        filename=f"{job['address']}_ClimateReport.pdf",
+    )
+
+@app.get("/report/queue")
+async def report_queue():
+    return await asyncio.to_thread(report_jobs.get_queue().depth)
+
+# ------------------- Cache Stats -------------------
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "envirotrust": api_client.response_cache.stats(),
+        "envirotrust_neighbours": api_client.neighbour_index.stats(),
+        "envirotrust_daily": await asyncio.to_thread(lambda: daily_store.get_store().stats()),
+        "report_bundles": services.report_bundles.stats(),
+        "report_artifacts": await asyncio.to_thread(artifact_store.get_store().stats),
+        "coalescing": {
+            "report": services.report_flight.stats(),
+            "envirotrust": api_client.upstream_flight.stats(),
+        },
     }
-    
-    return StreamingResponse(pdf_buffer, media_type="application/pdf", headers=headers)
+
+# ------------------- Upstream Health -------------------
+@app.get("/health/upstreams")
+async def upstream_health():
+    """Circuit breaker state, hedged request counts and recent latency per EnviroTrust endpoint."""
+    return {"envirotrust": api_client.health.stats()}
+
+# ------------------- Metrics -------------------
+@metrics.register_collector
+def _cache_metrics():
+    neighbours = api_client.neighbour_index.stats()["endpoints"].values()
+    caches = {
+        "envirotrust_response": api_client.response_cache.stats(),
+        "envirotrust_neighbour": {
+            "hits": sum(item["hits"] for item in neighbours),
+            "misses": sum(item["misses"] for item in neighbours),
+        },
+        "envirotrust_daily": daily_store.get_store().stats(),
+        "report_bundle": services.report_bundles.stats(),
+        "report_artifact": artifact_store.get_store().stats(),
+    }
+    flights = {"report": services.report_flight.stats(), "envirotrust": api_client.upstream_flight.stats()}
+    return [
+        ("climatelens_cache_hits_total", "counter", "Cache hits.",
+         [({"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("climatelens_cache_misses_total", "counter", "Cache misses.",
+         [({"cache": name}, stats["misses"]) for name, stats in caches.items()]),
+        ("climatelens_coalesced_requests_total", "counter", "Requests that joined an identical in-flight call.",
+         [({"flight": name}, stats["coalesced"]) for name, stats in flights.items()]),
+    ]
+
+@metrics.register_collector
+def _upstream_metrics():
+    endpoints = api_client.health.stats()
+
+    def labels(endpoint):
+        return {"upstream": "envirotrust", "endpoint": endpoint}
+
+    return [
+        ("climatelens_circuit_open", "gauge", "1 while an upstream endpoint's circuit breaker is open or half-open.",
+         [(labels(endpoint), int(stats["state"] != "closed")) for endpoint, stats in endpoints.items()]),
+        ("climatelens_circuit_rejected_total", "counter", "Upstream calls failed fast by an open circuit.",
+         [(labels(endpoint), stats["rejected"]) for endpoint, stats in endpoints.items()]),
+        ("climatelens_upstream_hedged_total", "counter", "Duplicate requests sent for slow upstream calls.",
+         [(labels(endpoint), stats["hedged"]) for endpoint, stats in endpoints.items()]),
+    ]
+
+@metrics.register_collector
+def _llm_metrics():
+    stats = llm_client.current_stats()
+    if stats is None:
+        return []
+    return [
+        ("climatelens_llm_tokens_total", "counter", "Groq tokens used.",
+         [({"kind": "prompt"}, stats["prompt_tokens"]), ({"kind": "completion"}, stats["completion_tokens"])]),
+        ("climatelens_llm_in_flight", "gauge", "Groq calls in progress.", [({}, stats["in_flight"])]),
+        ("climatelens_llm_queued", "gauge", "Groq calls waiting for a concurrency slot.", [({}, stats["queued"])]),
+    ]
+
+@metrics.register_collector
+def _queue_metrics():
+    depth = report_jobs.get_queue().depth()
+    return [
+        ("climatelens_report_jobs", "gauge", "Report jobs by status.",
+         [({"status": status}, depth[status]) for status in ("queued", "running", "done", "failed")]),
+    ]
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    body = await asyncio.to_thread(metrics.render)
+    return Response(body, media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # ------------------- Contact Form -------------------
 @app.post("/contact")
@@ -0,0 +1,204 @@
+import time
+import bisect
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+
+# Minimal Prometheus metrics: counters and histograms with labels, plus
+# collectors that read existing stats() counters at scrape time. Values are
+# per process; with several uvicorn workers, scrape each one (or sum them).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+BYTE_BUCKETS = tuple(2 ** n * 1024 for n in range(6, 16))  # 64 KiB .. 32 MiB
+
+_metrics = []
+_collectors = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(dict(zip(self.labels, key)))} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(state)) for key, state in sorted(self._values.items())]
+        for key, state in items:
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(float(bound))})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(float(state[-2]))}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {state[-1]}")
+        return lines
+
+
+def register_collector(func):
+    """
+    Register `func() -> [(name, type, help, [(labels, value), ...]), ...]`,
+    called at scrape time for values that already live in stats() counters.
+    """
+    _collectors.append(func)
+    return func
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            families = collector()
+        except Exception as e:
+            logging.warning(f"Metrics collector {collector.__name__} failed: {e}")
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "climatelens_stage_duration_seconds", "Duration of report pipeline stages.", ("stage",)
+)
+STAGE_ERRORS = Counter("climatelens_stage_errors_total", "Report pipeline stages that failed, including data fetches.", ("stage",))
+UPSTREAM_SECONDS = Histogram(
+    "climatelens_upstream_request_duration_seconds",
+    "Latency of upstream API calls (EnviroTrust, OpenCage, Groq).",
+    ("upstream", "endpoint"),
+)
+UPSTREAM_ERRORS = Counter(
+    "climatelens_upstream_errors_total", "Failed upstream API calls.", ("upstream", "endpoint")
+)
+HTTP_SECONDS = Histogram(
+    "climatelens_http_request_duration_seconds",
+    "API request latency until response headers are sent.",
+    ("method", "route", "status"),
+)
+LLM_QUEUE_SECONDS = Histogram(
+    "climatelens_llm_queue_seconds", "Time LLM calls wait for a concurrency slot."
+)
+DEGRADED_SOURCES = Counter(
+    "climatelens_degraded_sources_total",
+    "Data sources missing from a preview or report because their upstream call failed.",
+    ("source",),
+)
+PDF_BYTES = Histogram("climatelens_pdf_bytes", "Size of generated PDF reports.", buckets=BYTE_BUCKETS)
+
+
+@contextmanager
+def span(stage: str, **fields):
+    """Time a pipeline stage: log it, record its duration and count failures."""
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+        if status == "error":
+            STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_SECONDS.observe(duration, stage=stage)
+        extra = "".join(f' {key}="{value}"' for key, value in fields.items())
+        logging.info(f"span stage={stage} status={status} duration_ms={duration * 1000:.1f}{extra}")
+
+
+@contextmanager
+def upstream_call(upstream: str, endpoint: str):
+    """Time one upstream API call, labelled by endpoint."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(upstream=upstream, endpoint=endpoint)
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, upstream=upstream, endpoint=endpoint)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording request latency by route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                HTTP_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=message["status"],
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_metrics)
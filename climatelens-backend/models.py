@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class RiskItem(BaseModel):
     name: str
@@ -11,3 +11,16 @@ class ClimatePreview(BaseModel):
     overallRisk: str
     summary: str
     risks: List[RiskItem]
+    degraded: List[str] = []  # data sources that were unavailable for this preview
+
+class ReportJob(BaseModel):
+    jobId: str
+    address: str
+    status: str
+    priority: int
+    queuePosition: Optional[int] = None
+    createdAt: float
+    startedAt: Optional[float] = None
+    finishedAt: Optional[float] = None
+    error: Optional[str] = None
+    downloadUrl: Optional[str] = None
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from geocoding import normalize_address
+
+# The narrative is fully determined by the prompt inputs at temperature 0.1,
+# so finished narratives are cached by a hash of those inputs and the model.
+CACHE_PATH = os.getenv(
+    "NARRATIVE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "narrative_cache.sqlite3"),
+)
+MAX_AGE = float(os.getenv("NARRATIVE_CACHE_MAX_AGE_DAYS", "30")) * 86400
+LRU_SIZE = int(os.getenv("NARRATIVE_LRU_SIZE", "256"))
+
+
+def prompt_version(system_prompt: str) -> str:
+    """Short hash of the system prompt; a new prompt invalidates every cached narrative."""
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def narrative_key(model, lat, lon, address, risk_score, flood_zone, wildfire_now, charts) -> str:
+    """Hash of the normalized `_build_prompt` inputs and the model name."""
+    scores = (risk_score or {}).get("scores", {}) or {}
+    inputs = {
+        "model": model,
+        "address": normalize_address(address),
+        "lat": round(float(lat), 5),
+        "lon": round(float(lon), 5),
+        "air_quality": scores.get("air_quality"),
+        "flood_risk": scores.get("flood_risk"),
+        "wildfire_risk": scores.get("wildfire_risk"),
+        "flood_zone": (flood_zone or {}).get("flood_zone"),
+        "fire_risk_class": ((wildfire_now or {}).get("properties", {}) or {}).get("fire_risk_class"),
+        "charts": sorted(charts),
+    }
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class NarrativeCache:
+    """
+    In-memory LRU in front of a SQLite store, both holding narrative JSON.
+    Blocking; call it through asyncio.to_thread.
+    """
+
+    def __init__(self, version: str, path: str = CACHE_PATH, max_age: float = MAX_AGE, lru_size: int = LRU_SIZE):
+        self.version = version
+        self.path = path
+        self.max_age = max_age
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()  # the LRU is used from asyncio.to_thread workers
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA busy_timeout = 10000")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS narratives (
+                        key TEXT PRIMARY KEY,
+                        prompt_version TEXT NOT NULL,
+                        narrative TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                    """
+                )
+                # Only expired rows are dropped: during a rolling deploy, workers on the
+                # old and new SYSTEM_PROMPT share this file, and lookups already
+                # ignore rows of other prompt versions.
+                removed = conn.execute(
+                    "DELETE FROM narratives WHERE created_at < ?", (time.time() - self.max_age,)
+                ).rowcount
+        finally:
+            conn.close()
+        if removed:
+            logging.info(f"Narrative cache: dropped {removed} expired entries.")
+
+    def _remember(self, key: str, entry: tuple):
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def get(self, key: str):
+        """Return a fresh copy of the cached narrative, or None."""
+        with self._lock:
+            entry = self._lru.get(key)
+        if entry is None:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT narrative, created_at FROM narratives WHERE key = ? AND prompt_version = ?",
+                    (key, self.version),
+                ).fetchone()
+            finally:
+                conn.close()
+            if row is None:
+                return None
+            entry = row
+        payload, created_at = entry
+        if time.time() - created_at > self.max_age:
+            self.invalidate(key)
+            return None
+        self._remember(key, entry)
+        return json.loads(payload)
+
+    def put(self, key: str, narrative: dict):
+        entry = (json.dumps(narrative), time.time())
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO narratives (key, prompt_version, narrative, created_at) VALUES (?, ?, ?, ?)",
+                    (key, self.version, *entry),
+                )
+        finally:
+            conn.close()
+        self._remember(key, entry)
+
+    def invalidate(self, key: str = None):
+        """Drop one narrative, or every narrative when no key is given."""
+        conn = self._connect()
+        try:
+            with conn:
+                if key is None:
+                    conn.execute("DELETE FROM narratives")
+                else:
+                    conn.execute("DELETE FROM narratives WHERE key = ?", (key,))
+        finally:
+            conn.close()
+        with self._lock:
+            if key is None:
+                self._lru.clear()
+            else:
+                self._lru.pop(key, None)
@@ -0,0 +1,58 @@
+import asyncio
+
+
+class TaskGraph:
+    """
+    Minimal async task graph. Each node is an async function whose positional
+    arguments are the results of its dependencies; a node starts as soon as
+    all of its own dependencies have finished, independently of other nodes.
+
+    `instrument(name)`, if given, is a context manager wrapped around each
+    node's own work (not the wait for its dependencies).
+    """
+
+    def __init__(self, instrument=None):
+        self._nodes = {}
+        self._tasks = {}
+        self._instrument = instrument
+
+    def add(self, name: str, func, *deps: str):
+        if name in self._nodes:
+            raise ValueError(f"Duplicate task '{name}'")
+        self._nodes[name] = (func, deps)
+        return self
+
+    def _task(self, name: str) -> asyncio.Task:
+        task = self._tasks.get(name)
+        if task is None:
+            if name not in self._nodes:
+                raise KeyError(f"Unknown task '{name}'")
+            task = self._tasks[name] = asyncio.ensure_future(self._execute(name))
+        return task
+
+    async def _execute(self, name: str):
+        func, deps = self._nodes[name]
+        args = await asyncio.gather(*(self._task(dep) for dep in deps))
+        if self._instrument is None:
+            return await func(*args)
+        with self._instrument(name):
+            return await func(*args)
+
+    async def run(self, *targets: str) -> dict:
+        """
+        Run every node (all nodes by default) needed for `targets` and return
+        {name: result}. On failure, all outstanding nodes are cancelled.
+        """
+        names = targets or tuple(self._nodes)
+        try:
+            results = await asyncio.gather(*(self._task(name) for name in names))
+        except BaseException:
+            await self.cancel()
+            raise
+        return dict(zip(names, results))
+
+    async def cancel(self):
+        pending = [task for task in self._tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,185 @@
+import io
+import os
+import re
+import csv
+import json
+import asyncio
+import logging
+import zipfile
+import artifact_store
+from geocoding import normalize_address
+from services import fetch_climate_preview, generate_report
+
+# Portfolio batches run through the same preview/report path as single
+# requests. Properties are processed by a bounded set of workers, and a
+# process-wide limit caps how many properties are in progress across all
+# batches; per-upstream limits are applied in http_clients.
+MAX_ADDRESSES = int(os.getenv("PORTFOLIO_MAX_ADDRESSES", "5000"))
+BATCH_CONCURRENCY = int(os.getenv("PORTFOLIO_BATCH_CONCURRENCY", "8"))
+GLOBAL_CONCURRENCY = int(os.getenv("PORTFOLIO_GLOBAL_CONCURRENCY", "32"))
+ZIP_CHUNK_SIZE = 64 * 1024
+
+_slots = None
+
+
+def _global_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(GLOBAL_CONCURRENCY)
+    return _slots
+
+
+def parse_addresses(body: bytes, content_type: str) -> list:
+    """
+    Addresses from a JSON or CSV request body.
+
+    JSON may be a list of strings, a list of {"address": ...} objects, or an
+    object with an "addresses" list; a non-string address is a ValueError.
+    CSV uses the `address` column if the first non-blank row is a header with
+    one, otherwise the first column.
+    """
+    text = body.decode("utf-8-sig")
+    if "csv" in (content_type or ""):
+        rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+        if not rows:
+            return []
+        header = [cell.strip().lower() for cell in rows[0]]
+        column = 0
+        if "address" in header:
+            column = header.index("address")
+            rows = rows[1:]
+        addresses = [row[column] for row in rows if len(row) > column]
+    else:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("addresses", [])
+        if not isinstance(data, list):
+            raise ValueError("Expected a list of addresses")
+        addresses = []
+        for index, item in enumerate(data):
+            address = item.get("address", "") if isinstance(item, dict) else item
+            if not isinstance(address, str):
+                raise ValueError(f"Address {index} must be a string")
+            addresses.append(address)
+
+    addresses = [address.strip() for address in addresses if address and address.strip()]
+    if len(addresses) > MAX_ADDRESSES:
+        raise ValueError(f"At most {MAX_ADDRESSES} addresses per batch")
+    return addresses
+
+
+async def _assess(index: int, address: str, with_pdf: bool) -> dict:
+    result = {"index": index, "address": address}
+    try:
+        preview = await fetch_climate_preview(address)
+        result.update(status="ok", preview=preview.model_dump(), degraded=preview.degraded)
+    except Exception as e:
+        logging.warning(f"[PORTFOLIO] Preview failed for {address}: {e}")
+        result.update(status="error", error=str(e))
+        return result
+    if with_pdf:
+        try:
+            store = artifact_store.get_store()
+            key = normalize_address(address)
+            artifact = await asyncio.to_thread(store.lookup, key)
+            if artifact is None:
+                report = await generate_report(address)
+                if report["degraded"]:
+                    result["degraded"] = sorted(set(result["degraded"]) | set(report["degraded"]))
+                artifact = await asyncio.to_thread(store.put, key, report["pdf"], not report["degraded"])
+            result["artifact"] = artifact
+        except Exception as e:
+            logging.warning(f"[PORTFOLIO] Report failed for {address}: {e}")
+            result.update(status="error", error=str(e))
+    return result
+
+
+async def assess_portfolio(addresses: list, with_pdf: bool = False, concurrency: int = BATCH_CONCURRENCY):
+    """Yield one result dict per address, in completion order."""
+    results = asyncio.Queue()
+    pending = iter(enumerate(addresses))
+    slots = _global_slots()
+
+    async def worker():
+        for index, address in pending:
+            async with slots:
+                result = await _assess(index, address, with_pdf)
+            await results.put(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(addresses)))]
+    try:
+        for _ in range(len(addresses)):
+            yield await results.get()
+    finally:
+        # Client went away (or the batch finished): stop any remaining work
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+def _public(result: dict) -> dict:
+    return {key: value for key, value in result.items() if key != "artifact"}
+
+
+async def stream_ndjson(addresses: list):
+    """NDJSON lines of per-property preview results, as each property finishes."""
+    async for result in assess_portfolio(addresses):
+        yield json.dumps(_public(result)) + "\n"
+
+
+class _ZipBuffer:
+    """Write-only sink for ZipFile; chunks are handed out with `drain` as the archive is written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_UNSAFE_FILENAME = re.compile(r"[^\w\-]+")
+
+
+def _pdf_name(result: dict) -> str:
+    stem = _UNSAFE_FILENAME.sub("_", result["address"]).strip("_")[:80] or "property"
+    return f"{result['index'] + 1:04d}_{stem}_ClimateReport.pdf"
+
+
+async def stream_zip(addresses: list):
+    """
+    ZIP archive of every property's PDF plus a `results.ndjson` summary,
+    streamed entry by entry. Only one file chunk is in memory at a time.
+    """
+    sink = _ZipBuffer()
+    summary = []
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async for result in assess_portfolio(addresses, with_pdf=True):
+            artifact = result.get("artifact")
+            src = None
+            if artifact is not None:
+                try:
+                    src = open(artifact["path"], "rb")
+                except OSError as e:
+                    # Evicted from the artifact store between generation and zipping
+                    result.update(status="error", error=f"Report file unavailable: {e}")
+            if src is not None:
+                result["file"] = _pdf_name(result)
+                with src, archive.open(zipfile.ZipInfo(result["file"]), mode="w", force_zip64=True) as dst:
+                    while chunk := src.read(ZIP_CHUNK_SIZE):
+                        dst.write(chunk)
+                        yield sink.drain()
+            summary.append(_public(result))
+            if data := sink.drain():
+                yield data
+        summary.sort(key=lambda item: item["index"])
+        archive.writestr("results.ndjson", "".join(json.dumps(item) + "\n" for item in summary))
+    yield sink.drain()
@@ -0,0 +1,77 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from geocoding import normalize_address
+
+# Data fetched for an address is kept in a bundle so a /report/download that
+# follows a /report/preview reuses the coordinates and risk responses the
+# preview already fetched, and only adds what the full report needs.
+BUNDLE_TTL = float(os.getenv("REPORT_BUNDLE_TTL_SECONDS", "900"))
+MAX_BUNDLES = int(os.getenv("REPORT_BUNDLE_MAX_ENTRIES", "512"))
+
+
+def _retrieve(task: asyncio.Task):
+    # Mark failures as retrieved; callers that went away would otherwise leave them unobserved
+    if not task.cancelled():
+        task.exception()
+
+
+class ReportBundle:
+    """
+    Named data items for one address. Each item is fetched at most once and
+    shared by every caller; a failed fetch is retried by the next caller.
+    Payloads are shared and must be treated as read-only.
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self.created_at = time.monotonic()
+        self._tasks = {}
+
+    async def get(self, name: str, fetch):
+        """Return item `name`, running `fetch()` if no caller has fetched it yet."""
+        task = self._tasks.get(name)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = self._tasks[name] = asyncio.ensure_future(fetch())
+            task.add_done_callback(_retrieve)
+        # Shielded so a cancelled caller does not throw away a fetch others may need
+        return await asyncio.shield(task)
+
+    def loaded(self) -> list:
+        return sorted(
+            name for name, task in self._tasks.items()
+            if task.done() and not task.cancelled() and task.exception() is None
+        )
+
+
+class BundleCache:
+    """In-process LRU of report bundles keyed by normalized address."""
+
+    def __init__(self, ttl: float = BUNDLE_TTL, max_entries: int = MAX_BUNDLES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._bundles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, address: str) -> ReportBundle:
+        """The live bundle for this address, creating a new one if none is fresh."""
+        key = normalize_address(address)
+        bundle = self._bundles.get(key)
+        if bundle is not None and time.monotonic() - bundle.created_at <= self.ttl:
+            self.hits += 1
+            self._bundles.move_to_end(key)
+            return bundle
+        self.misses += 1
+        bundle = self._bundles[key] = ReportBundle(address)
+        self._bundles.move_to_end(key)
+        while len(self._bundles) > self.max_entries:
+            self._bundles.popitem(last=False)
+        return bundle
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._bundles)}
+
+
+report_bundles = BundleCache()
@@ -0,0 +1,444 @@
+import os
+import sys
+import time
+import uuid
+import sqlite3
+import asyncio
+import tempfile
+import logging
+
+# Report jobs are queued in SQLite so web workers and report workers can be
+# scaled separately: any process on the host can submit, and any process
+# running a ReportWorkerPool can execute.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUEUE_PATH = os.getenv("REPORT_QUEUE_PATH", os.path.join(BASE_DIR, "report_jobs.sqlite3"))
+RESULTS_DIR = os.getenv("REPORT_RESULTS_DIR", os.path.join(BASE_DIR, "report_results"))
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+# A running job's lease is extended every third of this while its worker is alive
+JOB_LEASE_SECONDS = float(os.getenv("REPORT_JOB_LEASE_SECONDS", "120"))
+# Jobs whose worker died this many times are failed instead of requeued
+JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION_SECONDS = float(os.getenv("REPORT_JOB_RETENTION_HOURS", "24")) * 3600
+POLL_INTERVAL = float(os.getenv("REPORT_QUEUE_POLL_INTERVAL", "0.5"))
+MAINTENANCE_INTERVAL = 60.0
+# A worker that hits an unexpected error waits this long, doubling up to the max
+ERROR_BACKOFF = 1.0
+ERROR_BACKOFF_MAX = 30.0
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueue:
+    """Persistent priority queue of report jobs. Higher priority runs first, then FIFO."""
+
+    def __init__(self, path: str = QUEUE_PATH, results_dir: str = RESULTS_DIR):
+        self.path = path
+        self.results_dir = results_dir
+        os.makedirs(self.results_dir, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 10000")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    address TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    lease_id TEXT,
+                    finished_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    result_path TEXT,
+                    result_size INTEGER
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "heartbeat_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            if "lease_id" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_id TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created_at)")
+        finally:
+            conn.close()
+
+    def submit(self, address: str, priority: int = 0) -> str:
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, address, priority, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, address, priority, QUEUED, time.time()),
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def get(self, job_id: str):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def position(self, job_id: str) -> int:
+        """Number of queued jobs that will run before this one (None if not queued)."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """
+                SELECT COUNT(*) FROM jobs AS other, jobs AS me
+                WHERE me.id = ? AND me.status = ? AND other.status = ?
+                  AND (other.priority > me.priority
+                       OR (other.priority = me.priority AND other.created_at < me.created_at))
+                """,
+                (job_id, QUEUED, QUEUED),
+            ).fetchone()
+            queued = conn.execute("SELECT 1 FROM jobs WHERE id = ? AND status = ?", (job_id, QUEUED)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if queued else None
+
+    def claim(self):
+        """
+        Atomically take the next queued job, or return None. The returned row's
+        `lease_id` identifies this run; later updates for it must pass it back.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            lease_id = uuid.uuid4().hex
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, started_at = ?, heartbeat_at = ?, lease_id = ?, attempts = attempts + 1
+                WHERE id = ?
+                """,
+                (RUNNING, now, now, lease_id, row["id"]),
+            )
+            conn.execute("COMMIT")
+            return {**dict(row), "status": RUNNING, "started_at": now, "heartbeat_at": now,
+                    "lease_id": lease_id, "attempts": row["attempts"] + 1}
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, pdf_bytes, lease_id: str):
+        """
+        Store the result of a run. Returns the result path, or None if the job
+        is no longer leased to this run (its lease expired and it was requeued
+        or failed); the result is then discarded.
+        """
+        path = os.path.join(self.results_dir, f"{job_id}.pdf")
+        # Unique temp name: a requeued job can be finishing in two workers at once
+        fd, tmp_path = tempfile.mkstemp(dir=self.results_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf_bytes)
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                leased = conn.execute(
+                    "SELECT 1 FROM jobs WHERE id = ? AND status = ? AND lease_id = ?", (job_id, RUNNING, lease_id)
+                ).fetchone()
+                if leased is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                os.replace(tmp_path, path)
+                conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, finished_at = ?, result_path = ?, result_size = ?, error = NULL,
+                                    lease_id = NULL
+                    WHERE id = ?
+                    """,
+                    (DONE, time.time(), path, len(pdf_bytes), job_id),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def fail(self, job_id: str, error: str, lease_id: str) -> bool:
+        """Mark a run as failed; False if the job is no longer leased to it."""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                """
+                UPDATE jobs SET status = ?, finished_at = ?, error = ?, lease_id = NULL
+                WHERE id = ? AND status = ? AND lease_id = ?
+                """,
+                (FAILED, time.time(), error, job_id, RUNNING, lease_id),
+            ).rowcount > 0
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: str, lease_id: str) -> bool:
+        """Extend a running job's lease; False if it is no longer leased to this run."""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ? AND lease_id = ?",
+                (time.time(), job_id, RUNNING, lease_id),
+            ).rowcount > 0
+        finally:
+            conn.close()
+
+    def requeue(self, job_id: str, lease_id: str):
+        """Hand a job back after a clean shutdown; this does not count as an attempt."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, started_at = NULL, heartbeat_at = NULL, lease_id = NULL,
+                                attempts = attempts - 1
+                WHERE id = ? AND status = ? AND lease_id = ?
+                """,
+                (QUEUED, job_id, RUNNING, lease_id),
+            )
+        finally:
+            conn.close()
+
+    def requeue_expired(self, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        """
+        Put jobs whose worker died mid-run (lease not extended in time) back in
+        the queue, or fail them once they have used up `max_attempts`.
+        """
+        cutoff = time.time() - JOB_LEASE_SECONDS
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            failed = conn.execute(
+                """
+                UPDATE jobs SET status = ?, finished_at = ?, error = ?, lease_id = NULL
+                WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ? AND attempts >= ?
+                """,
+                (FAILED, time.time(), f"Report worker stopped during all {max_attempts} attempts",
+                 RUNNING, cutoff, max_attempts),
+            ).rowcount
+            count = conn.execute(
+                """
+                UPDATE jobs SET status = ?, started_at = NULL, heartbeat_at = NULL, lease_id = NULL
+                WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ?
+                """,
+                (QUEUED, RUNNING, cutoff),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if failed:
+            logging.error(f"Failed {failed} report job(s) after {max_attempts} attempts with expired leases.")
+        if count:
+            logging.warning(f"Requeued {count} report job(s) with expired leases.")
+        return count
+
+    def purge_finished(self, older_than: float = JOB_RETENTION_SECONDS) -> int:
+        cutoff = time.time() - older_than
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, result_path FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, cutoff),
+            ).fetchall()
+            # Rows first, so a download that starts now gets a 404 rather than a missing file
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, cutoff)
+            )
+        finally:
+            conn.close()
+        for row in rows:
+            if row["result_path"]:
+                try:
+                    os.remove(row["result_path"])
+                except OSError:
+                    pass
+        return len(rows)
+
+    def depth(self) -> dict:
+        conn = self._connect()
+        try:
+            by_status = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            by_priority = dict(
+                conn.execute(
+                    "SELECT priority, COUNT(*) FROM jobs WHERE status = ? GROUP BY priority", (QUEUED,)
+                ).fetchall()
+            )
+        finally:
+            conn.close()
+        return {
+            "queued": by_status.get(QUEUED, 0),
+            "running": by_status.get(RUNNING, 0),
+            "done": by_status.get(DONE, 0),
+            "failed": by_status.get(FAILED, 0),
+            "queued_by_priority": {str(p): n for p, n in sorted(by_priority.items(), reverse=True)},
+        }
+
+    async def wait(self, job_id: str, timeout: float):
+        """Poll until the job finishes or `timeout` seconds pass; returns the job row."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await asyncio.to_thread(self.get, job_id)
+            if job is None or job["status"] in (DONE, FAILED) or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(min(POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+
+class ReportWorkerPool:
+    """Bounded pool of asyncio workers that drain the job queue."""
+
+    def __init__(self, queue: JobQueue, workers: int = REPORT_WORKERS):
+        self.queue = queue
+        self.workers = workers
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._last_maintenance = 0.0
+
+    def notify(self):
+        """Wake idle workers in this process after a local submit."""
+        self._wakeup.set()
+
+    async def start(self):
+        await asyncio.to_thread(self.queue.requeue_expired)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logging.info(f"Report worker pool started ({self.workers} workers).")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _heartbeat(self, job: dict):
+        """Keep the job's lease alive while it runs, so long reports are not requeued mid-run."""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                if not await asyncio.to_thread(self.queue.heartbeat, job["id"], job["lease_id"]):
+                    logging.warning(f"[JOB {job['id']}] Lease lost; the job was requeued by another worker.")
+                    return
+            except sqlite3.Error as e:
+                logging.warning(f"[JOB {job['id']}] Heartbeat failed: {e}")
+
+    async def _worker(self, index: int):
+        # Imported here so processes that only submit jobs skip the report stack
+        from services import generate_pdf_report_service
+
+        backoff = ERROR_BACKOFF
+        while True:
+            try:
+                await self._step(index, generate_pdf_report_service)
+                backoff = ERROR_BACKOFF
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. "database is locked" or a full disk: keep this worker alive.
+                # A job it was running keeps its lease until that expires.
+                logging.exception(f"Report worker {index} error, retrying in {backoff:.0f}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, ERROR_BACKOFF_MAX)
+
+    async def _step(self, index: int, generate):
+        """Run one claimed job, or do maintenance and wait for work if the queue is empty."""
+        job = await asyncio.to_thread(self.queue.claim)
+        if job is None:
+            if index == 0 and time.monotonic() - self._last_maintenance > MAINTENANCE_INTERVAL:
+                self._last_maintenance = time.monotonic()
+                await asyncio.to_thread(self.queue.requeue_expired)
+                await asyncio.to_thread(self.queue.purge_finished)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL * 4)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        logging.info(f"[JOB {job['id']}] Generating report for: {job['address']}")
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            pdf_bytes = await generate(job["address"])
+            path = await asyncio.to_thread(self.queue.complete, job["id"], pdf_bytes, job["lease_id"])
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back to the queue for another worker
+            await asyncio.shield(asyncio.to_thread(self.queue.requeue, job["id"], job["lease_id"]))
+            raise
+        except Exception as e:
+            logging.error(f"[JOB {job['id']}] Failed: {e}")
+            await asyncio.to_thread(self.queue.fail, job["id"], str(e), job["lease_id"])
+            return
+        finally:
+            heartbeat.cancel()
+        if path is None:
+            logging.warning(f"[JOB {job['id']}] Lease lost before completion; result discarded.")
+        else:
+            logging.info(f"[JOB {job['id']}] Done ({len(pdf_bytes)} bytes).")
+
+
+_queue = None
+
+
+def get_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
+
+
+async def run_standalone_workers(workers: int = REPORT_WORKERS):
+    """Entry point for a dedicated report-worker process."""
+    import http_clients
+    import chart_renderer
+    import llm_client
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    await http_clients.startup()
+    await chart_renderer.startup()
+    await llm_client.startup()
+    pool = ReportWorkerPool(get_queue(), workers)
+    await pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await llm_client.shutdown()
+        await chart_renderer.shutdown()
+        await http_clients.shutdown()
+
+
+if __name__ == "__main__":
+    # Usage: python report_jobs.py worker [N]
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2 or sys.argv[1] != "worker":
+        print("Usage: python report_jobs.py worker [num_workers]")
+        sys.exit(1)
+    asyncio.run(run_standalone_workers(int(sys.argv[2]) if len(sys.argv) > 2 else REPORT_WORKERS))
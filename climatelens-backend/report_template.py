@@ -0,0 +1,165 @@
+import os
+import copy
+import logging
+import threading
+from io import BytesIO
+from fpdf import FPDF
+from fpdf.fonts import TTFFont, SubsetMap
+from fpdf.image_parsing import preload_image
+from fontTools import ttLib
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
+
+# Colors
+COLOR_BLUE = (0, 102, 204)
+COLOR_DARK_GREEN = (0, 100, 0)
+COLOR_GREY = (128, 128, 128)
+
+FONT_FAMILY = "DejaVu"
+FONT_FILES = {
+    "": "DejaVuSans.ttf",
+    "B": "DejaVuSans-Bold.ttf",
+    "I": "DejaVuSans-Oblique.ttf",
+    "BI": "DejaVuSans-BoldOblique.ttf",
+}
+LOGO_FILE = "ClimateLens Logo.png"
+
+# Static cover layout
+COVER_TITLE = "Climate & ESG Risk Report"
+LOGO_X = 85
+LOGO_W = 40
+HEADER_TEXT = "ClimateLens – Climate & ESG Report"
+
+# TTFFont attributes that are read-only once a font is parsed and can be
+# shared between documents. `ttfont` and `subset` are per document because
+# fpdf subsets the font in place when the PDF is written.
+_SHARED_FONT_ATTRS = (
+    "type", "name", "desc", "glyph_ids", "sp", "ss", "up", "ut", "cw",
+    "ttffile", "fontkey", "emphasis", "scale", "cmap",
+)
+
+
+class PDF(FPDF):
+    # True when fonts and logo were installed from the template's parsed copies
+    shares_template = False
+
+    def header(self):
+        self.set_font(FONT_FAMILY, "B", 10)
+        self.set_text_color(*COLOR_GREY)
+        self.cell(0, 10, HEADER_TEXT, 0, 0, "C")
+        self.ln(15)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font(FONT_FAMILY, "I", 8)
+        self.set_text_color(*COLOR_GREY)
+        self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
+
+
+class ReportTemplate:
+    """
+    Static report resources prepared once per process: parsed DejaVu font
+    metrics, the decoded logo and the cover layout. Each report only adds
+    its dynamic content on top of `new_document()`.
+
+    Sharing them relies on fpdf2 internals (TTFFont fields, the image cache),
+    written against the fpdf2 2.8 series that pyproject.toml pins. If a
+    document built that way fails, callers rebuild it with
+    `new_document(reuse=False)` and turn sharing off via `disable_reuse`.
+    """
+
+    def __init__(self, assets_dir: str = ASSETS_DIR):
+        self.assets_dir = assets_dir
+        self.reuse = True
+        self._fonts = {}
+        self._logo = None
+        self._load_fonts()
+        self._load_logo()
+
+    def _load_fonts(self):
+        scratch = FPDF()
+        for style, filename in FONT_FILES.items():
+            path = os.path.join(self.assets_dir, filename)
+            with open(path, "rb") as f:
+                font_bytes = f.read()
+            fontkey = f"{FONT_FAMILY.lower()}{style}"
+            prototype = TTFFont(scratch, path, fontkey, style)
+            prototype.close()
+            self._fonts[fontkey] = (style, path, font_bytes, prototype)
+
+    def _load_logo(self):
+        path = os.path.join(self.assets_dir, LOGO_FILE)
+        if not os.path.exists(path):
+            logging.warning("Logo not found, using placeholder box.")
+            return
+        with open(path, "rb") as f:
+            logo_bytes = f.read()
+        scratch = FPDF()
+        name, _, info = preload_image(scratch.image_cache, BytesIO(logo_bytes))
+        self._logo = (logo_bytes, name, info)
+
+    def _clone_font(self, pdf: FPDF, fontkey: str) -> TTFFont:
+        _, _, font_bytes, prototype = self._fonts[fontkey]
+        font = TTFFont.__new__(TTFFont)
+        for attr in _SHARED_FONT_ATTRS:
+            setattr(font, attr, getattr(prototype, attr))
+        font.i = len(pdf.fonts) + 1
+        # Lazy load: only the tables needed for subsetting at output are parsed
+        font.ttfont = ttLib.TTFont(BytesIO(font_bytes), recalcTimestamp=False, fontNumber=0, lazy=True)
+        font.missing_glyphs = []
+        font.subset = SubsetMap(font)
+        return font
+
+    def _install_fonts(self, pdf: FPDF):
+        for fontkey, (style, path, _, _) in self._fonts.items():
+            try:
+                pdf.fonts[fontkey] = self._clone_font(pdf, fontkey)
+            except Exception as e:
+                logging.warning(f"Could not reuse parsed font '{fontkey}', re-parsing: {e}")
+                pdf.fonts.pop(fontkey, None)
+                pdf.add_font(FONT_FAMILY, style, path)
+
+    def new_document(self, reuse: bool = None) -> PDF:
+        pdf = PDF()
+        pdf.set_auto_page_break(auto=True, margin=25)
+        pdf.shares_template = self.reuse if reuse is None else reuse
+        if pdf.shares_template:
+            self._install_fonts(pdf)
+        else:
+            for style, path, _, _ in self._fonts.values():
+                pdf.add_font(FONT_FAMILY, style, path)
+        return pdf
+
+    def disable_reuse(self, error: Exception):
+        if self.reuse:
+            logging.warning(f"Report template: shared fonts/logo failed with this fpdf2 ({error}); parsing them per document.")
+            self.reuse = False
+
+    def add_logo(self, pdf: FPDF):
+        """Place the logo on the cover, reusing the image decoded at startup."""
+        if self._logo is None:
+            pdf.set_fill_color(230, 230, 230)
+            pdf.rect(x=LOGO_X, y=pdf.get_y(), w=LOGO_W, h=LOGO_W, style="F")
+            return
+        logo_bytes, name, info = self._logo
+        if pdf.shares_template and name not in pdf.image_cache.images and not info.get("iccp"):
+            doc_info = copy.copy(info)
+            doc_info["i"] = len(pdf.image_cache.images) + 1
+            doc_info["usages"] = 0
+            doc_info["iccp_i"] = None
+            pdf.image_cache.images[name] = doc_info
+        pdf.image(BytesIO(logo_bytes), x=LOGO_X, w=LOGO_W)
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_template() -> ReportTemplate:
+    global _template
+    # Built from worker threads (warm-up, build_pdf); concurrent first calls wait for one build
+    with _template_lock:
+        if _template is None:
+            _template = ReportTemplate()
+            logging.info("Report template prepared.")
+    return _template
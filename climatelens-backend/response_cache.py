@@ -0,0 +1,113 @@
+import os
+import time
+from collections import OrderedDict, defaultdict
+
+# EnviroTrust data changes slowly, so responses are cached per endpoint and per
+# lat/lon grid cell. Property-specific endpoints use a ~1 m cell, i.e. the exact
+# location; only the gridded monthly air-quality series shares a cell between
+# neighbouring properties. Reuse across nearby properties for the coarse
+# time series is left to spatial_index, which knows each endpoint's radius.
+POINT_GRID_DEG = float(os.getenv("ENVIROTRUST_POINT_GRID_DEG", "0.00001"))  # 5 decimals, ~1 m
+GRID_DEG = float(os.getenv("ENVIROTRUST_CACHE_GRID_DEG", "0.01"))  # ~1 km
+MAX_ENTRIES = int(os.getenv("ENVIROTRUST_CACHE_MAX_ENTRIES", "5000"))
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Per-endpoint TTLs (seconds). A TTL of 0 disables caching for that endpoint.
+ENDPOINT_TTLS = {
+    "/api/climate_risk/risk_score": DAY,
+    "/api/flood/zone-current": 7 * DAY,
+    "/api/wildfire/risk-current": 6 * HOUR,
+    "/api/airquality/timeseries-daily": 6 * HOUR,
+    "/api/airquality/timeseries-monthly": DAY,
+    "/api/heat-wind/daily": 6 * HOUR,
+    "/api/wildfire/timeseries": 7 * DAY,
+    "/api/heat-wind/timeseries": 28 * DAY,
+}
+DEFAULT_TTL = HOUR
+
+# Per-endpoint grid sizes (degrees); endpoints not listed are cached per exact
+# location. Daily series are kept per location in daily_store.
+ENDPOINT_GRIDS = {
+    "/api/airquality/timeseries-monthly": GRID_DEG,
+}
+
+
+class ResponseCache:
+    """
+    In-process LRU keyed by (endpoint, quantized lat, quantized lon), with a
+    grid size and TTL per endpoint. Cached payloads are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self, grids: dict = None, max_entries: int = MAX_ENTRIES, ttls: dict = None,
+                 point_grid_deg: float = POINT_GRID_DEG):
+        self.grids = dict(ENDPOINT_GRIDS if grids is None else grids)
+        self.point_grid_deg = point_grid_deg
+        self.max_entries = max_entries
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self._entries = OrderedDict()
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+        self._evictions = defaultdict(int)
+
+    def ttl_for(self, path: str) -> float:
+        return self.ttls.get(path, DEFAULT_TTL)
+
+    def grid_for(self, path: str) -> float:
+        return self.grids.get(path, self.point_grid_deg)
+
+    def bucket(self, path: str, lat: float, lon: float) -> tuple:
+        """Quantize coordinates to the endpoint's grid."""
+        grid = self.grid_for(path)
+        return round(float(lat) / grid), round(float(lon) / grid)
+
+    def get(self, path: str, lat: float, lon: float):
+        """Return the cached payload, or None on a miss."""
+        if self.ttl_for(path) <= 0:
+            return None
+        key = (path, *self.bucket(path, lat, lon))
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self._hits[path] += 1
+                return value
+            del self._entries[key]
+            self._evictions[path] += 1
+        self._misses[path] += 1
+        return None
+
+    def put(self, path: str, lat: float, lon: float, value):
+        ttl = self.ttl_for(path)
+        if ttl <= 0:
+            return
+        key = (path, *self.bucket(path, lat, lon))
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            (evicted_path, _, _), _ = self._entries.popitem(last=False)
+            self._evictions[evicted_path] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit, miss and eviction counters, in total and per endpoint."""
+        endpoints = sorted(set(self._hits) | set(self._misses) | set(self._evictions))
+        return {
+            "entries": len(self._entries),
+            "hits": sum(self._hits.values()),
+            "misses": sum(self._misses.values()),
+            "evictions": sum(self._evictions.values()),
+            "endpoints": {
+                path: {
+                    "hits": self._hits[path],
+                    "misses": self._misses[path],
+                    "evictions": self._evictions[path],
+                }
+                for path in endpoints
+            },
+        }
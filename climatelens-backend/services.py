@@ -1,87 +1,78 @@
 import httpx
-from fpdf import FPDF
 from io import BytesIO
 import logging
 import os
 import asyncio
 from models import ClimatePreview, RiskItem
 import api_client
-import visualization
+import http_clients
+import metrics
+from geocoding import get_cache as get_geocode_cache, normalize_address
+from singleflight import SingleFlight
+from report_bundle import report_bundles
+import chart_renderer
+from pipeline import TaskGraph
 from ai_writer import AIWriter
+from upstream_health import CircuitOpenError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# Colors
-COLOR_BLUE = (0, 102, 204)
-COLOR_DARK_GREEN = (0, 100, 0)
-COLOR_GREY = (128, 128, 128)
-
 # --- PDF Generation ---
-class PDF(FPDF):
-    def header(self):
-        self.set_font("DejaVu", "B", 10)
-        self.set_text_color(*COLOR_GREY)
-        self.cell(0, 10, "ClimateLens – Climate & ESG Report", 0, 0, "C")
-        self.ln(15)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font("DejaVu", "I", 8)
-        self.set_text_color(*COLOR_GREY)
-        self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
+def _clean_text(text) -> str:
+    if text is None:
+        return ""
+    return text.replace("–", "-").replace("—", "-")
 
+# The PDF stack (fpdf, fontTools, PIL) is imported on first use, so
+# preview-only workers never load it.
 def safe_multi_cell(pdf, text, w=0, h=8, align='J'):
-    if text is None:
-        text = ""
-    text = text.replace("–", "-").replace("—", "-")
-    words = text.split(" ")
-    lines = []
-    current_line = ""
-    for word in words:
-        test_line = f"{current_line} {word}".strip()
-        if pdf.get_string_width(test_line) > pdf.w - pdf.l_margin - pdf.r_margin:
-            if current_line:
-                lines.append(current_line)
-            current_line = word
-        else:
-            current_line = test_line
-    if current_line:
-        lines.append(current_line)
-    for line in lines:
-        pdf.multi_cell(w, h, line, align=align)
-        pdf.ln(0)
-
-def build_pdf(lat, lon, address, overall_risk_value, risks: list, charts: dict, narrative: dict) -> BytesIO:
+    """Writes one paragraph through the single-pass text layout engine."""
+    import text_layout
+    text_layout.write_paragraph(pdf, _clean_text(text), w=w, h=h, align=align)
+
+def build_pdf(lat, lon, address, overall_risk_value, risks: list, charts: dict, narrative: dict, degraded: dict = None) -> bytearray:
     """
     Builds a PDF report for a given property including charts and AI-generated narrative.
-    Returns a BytesIO object containing the PDF.
+    `charts` maps chart keys to in-memory PNG bytes; `degraded` lists data sources
+    that were unavailable, which are named in a notice on the cover.
+    Returns the serialized PDF.
     """
+    from report_template import get_template
+
     logging.info("Starting PDF build process...")
-    pdf = PDF()
-    pdf.set_auto_page_break(auto=True, margin=25)
+    template = get_template()
+    args = (address, charts, narrative, degraded)
+    try:
+        pdf_bytes = _write_pdf(template, template.new_document(), *args)
+    except Exception as e:
+        if not template.reuse:
+            logging.error(f"Failed to build PDF: {e}")
+            raise
+        # Shared fonts/logo depend on fpdf2 internals; retry with per-document copies
+        logging.warning(f"PDF build with shared template resources failed, retrying without: {e}")
+        try:
+            pdf_bytes = _write_pdf(template, template.new_document(reuse=False), *args)
+        except Exception as retry_error:
+            logging.error(f"Failed to build PDF: {retry_error}")
+            raise
+        template.disable_reuse(e)
+    logging.info(f"PDF built successfully ({len(pdf_bytes)} bytes).")
+    return pdf_bytes
 
-    assets_dir = os.path.join(os.path.dirname(__file__), "assets")
-    pdf.add_font("DejaVu", "", os.path.join(assets_dir, "DejaVuSans.ttf"), uni=True)
-    pdf.add_font("DejaVu", "B", os.path.join(assets_dir, "DejaVuSans-Bold.ttf"), uni=True)
-    pdf.add_font("DejaVu", "I", os.path.join(assets_dir, "DejaVuSans-Oblique.ttf"), uni=True)
-    pdf.add_font("DejaVu", "BI", os.path.join(assets_dir, "DejaVuSans-BoldOblique.ttf"), uni=True)
+def _write_pdf(template, pdf, address, charts: dict, narrative: dict, degraded) -> bytearray:
+    import text_layout
+    from report_template import COLOR_BLUE, COLOR_DARK_GREEN, COVER_TITLE
 
     pdf.add_page()
 
     # Cover
     pdf.set_font("DejaVu", "B", 36)
     pdf.set_text_color(*COLOR_BLUE)
-    safe_multi_cell(pdf, "Climate & ESG Risk Report", h=12, align="C")
+    safe_multi_cell(pdf, COVER_TITLE, h=12, align="C")
     pdf.ln(10)
 
-    logo_path = os.path.join(assets_dir, "ClimateLens Logo.png")
-    if os.path.exists(logo_path):
-        pdf.image(logo_path, x=85, w=40)
-    else:
-        logging.warning("Logo not found, using placeholder box.")
-        pdf.set_fill_color(230, 230, 230)
-        pdf.rect(x=85, y=pdf.get_y(), w=40, h=40, style="F")
+    template.add_logo(pdf)
     pdf.ln(50)
 
     # Property address
@@ -99,6 +90,24 @@ def build_pdf(lat, lon, address, overall_risk_value, risks: list, charts: dict,
         "recent_daily": "Recent Daily Weather",
     }
 
+    # Missing data is stated, not silently left out
+    if degraded:
+        labels = [
+            f"{chart_labels.get(name[6:], 'A')} chart" if name.startswith("chart:") else SOURCE_LABELS.get(name, name)
+            for name in degraded
+        ]
+        pdf.set_font("DejaVu", "B", 12)
+        pdf.set_text_color(*COLOR_BLUE)
+        safe_multi_cell(pdf, "Data availability", h=8, align="C")
+        pdf.set_font("DejaVu", "", 10)
+        pdf.set_text_color(0, 0, 0)
+        safe_multi_cell(
+            pdf,
+            f"Some data was unavailable when this report was generated: {', '.join(labels)}. "
+            "The related figures and charts are not included.",
+            h=6, align="C",
+        )
+
     # Sections
     for section_key in section_order:
         section = narrative.get(section_key, {})
@@ -121,13 +130,12 @@ def build_pdf(lat, lon, address, overall_risk_value, risks: list, charts: dict,
 
             pdf.set_font("DejaVu", "", 11)
             pdf.set_text_color(0, 0, 0)
-            for p in subsection.get("paragraphs", []):
-                safe_multi_cell(pdf, p, h=6)
-                pdf.ln(1)
+            paragraphs = [_clean_text(p) for p in subsection.get("paragraphs", [])]
+            text_layout.write_paragraphs(pdf, paragraphs, h=6, spacing=1)
 
             if subsection.get("bullets"):
-                for bullet in subsection.get("bullets", []):
-                    safe_multi_cell(pdf, f"  • {bullet}", h=6)
+                bullets = [_clean_text(b) for b in subsection.get("bullets", [])]
+                text_layout.write_paragraphs(pdf, bullets, h=6, prefix="  • ")
                 pdf.ln(2)
 
             if subsection.get("charts"):
@@ -142,19 +150,12 @@ def build_pdf(lat, lon, address, overall_risk_value, risks: list, charts: dict,
                         page_width = pdf.w - pdf.l_margin - pdf.r_margin
                         chart_width = min(180, page_width)
                         x = (pdf.w - chart_width) / 2
-                        pdf.image(charts[chart_ref], x=x, w=chart_width)
+                        pdf.image(BytesIO(charts[chart_ref]), x=x, w=chart_width)
                         pdf.ln(5)
 
     logging.info("Encoding PDF to bytes...")
-    try:
-        pdf_bytes = pdf.output(dest='S').encode('latin1') if isinstance(pdf.output(dest='S'), str) else pdf.output(dest='S')
-        buf = BytesIO(pdf_bytes)
-        buf.seek(0)
-        logging.info("PDF built successfully.")
-        return buf
-    except Exception as e:
-        logging.error(f"Failed to build PDF: {e}")
-        raise
+    # Serialize exactly once; the buffer is streamed to the client as-is
+    return pdf.output()
 
 # --- Data Fetching and Processing ---
 '''
@@ -179,18 +180,26 @@ async def get_coordinates_for_address(address: str) -> dict:
         
     '''
 
+GEOCODE_TIMEOUT = float(os.getenv("OPENCAGE_TIMEOUT", "10"))
+
 async def get_coordinates_for_address(address: str) -> dict:
-    url = "https://api.opencagedata.com/geocode/v1/json"
+    """Geocodes an address, served from the geocoding cache when possible."""
+    cache = await asyncio.to_thread(get_geocode_cache)
+    return await cache.geocode(address, _fetch_opencage_coordinates)
+
+async def _fetch_opencage_coordinates(address: str) -> dict:
     params = {"q": address, "key": os.getenv("OPENCAGE_API_KEY")}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params, timeout=10.0)
-        response.raise_for_status()
-        data = response.json()
-        if data["results"]:
-            coords = data["results"][0]["geometry"]
-            return {"lat": coords["lat"], "lon": coords["lng"]}
-        else:
-            raise ValueError("No results found")
+    client = http_clients.get_client("opencage")
+    async with http_clients.limit("opencage"):
+        with metrics.upstream_call("opencage", "/geocode/v1/json"):
+            response = await client.get("/geocode/v1/json", params=params, timeout=GEOCODE_TIMEOUT)
+            response.raise_for_status()
+    data = response.json()
+    if data["results"]:
+        coords = data["results"][0]["geometry"]
+        return {"lat": coords["lat"], "lon": coords["lng"]}
+    else:
+        raise ValueError("No results found")
 
 
 def _map_risk_to_level(value: float, thresholds: list) -> str:
@@ -203,105 +212,225 @@ def _map_risk_to_level(value: float, thresholds: list) -> str:
         return "Moderate"
     return "High"
 
+# Report data sources as named in degradation notices
+SOURCE_LABELS = {
+    "risk_score": "Composite risk scores",
+    "wildfire_ts": "Wildfire history",
+    "heat_wind_ts": "Heat & wind climate scenarios",
+    "heat_wind_daily": "Recent daily weather",
+    "aq_daily": "Daily air quality",
+    "flood_zone": "Flood zone",
+    "wildfire_now": "Current wildfire risk",
+}
+
+def _degradations(results: dict) -> dict:
+    """Data sources whose fetch failed: {name: reason}. Each is counted in metrics."""
+    degraded = {}
+    for name, data in results.items():
+        if isinstance(data, BaseException):
+            degraded[name] = "upstream unavailable (circuit open)" if isinstance(data, CircuitOpenError) else str(data)[:200]
+            metrics.DEGRADED_SOURCES.inc(source=name)
+    return degraded
+
+# Preview risk items: (label, risk_score key). Scores are on a 0-10 scale.
+# The risk score endpoint has no heat or wind score, so the mock preview's
+# "Heat Risk" and "Wind Damage" items are not produced.
+PREVIEW_RISKS = [
+    ("Flood Risk", "flood_risk"),
+    ("Air Quality", "air_quality"),
+    ("Wildfire Hazard", "wildfire_risk"),
+]
+RISK_THRESHOLDS = [2.5, 5.0, 7.5]
+
+def _risk_scores(risk_score_data) -> dict:
+    """Numeric composite risk scores by key; missing or non-numeric scores are left out."""
+    scores = {}
+    for key, value in _as_dict(_as_dict(risk_score_data).get("scores")).items():
+        try:
+            scores[key] = float(value)
+        except (TypeError, ValueError):
+            continue
+    return scores
+
+def _overall_risk_value(scores: dict) -> float:
+    """Overall risk shown by both the preview and the PDF: the mean of the available scores."""
+    return sum(scores.values()) / len(scores) if scores else 0.0
+
 async def fetch_climate_preview(address: str) -> ClimatePreview:
     """
-    Mock data to simulate climate risk preview.
-    Replace this with GPT-5 API call later.
+    Risk preview from the cheap EnviroTrust endpoints only (no charts, no LLM).
+    The responses are kept in the address bundle for a following download.
     """
-    return ClimatePreview(
-        address=address,
-        overallRisk="Moderate",
-        summary=f"Based on our analysis of {address}, this location shows moderate climate risks.",
-        risks=[
-            RiskItem(name="Flood Risk", value=25, level="Moderate"),
-            RiskItem(name="Air Quality", value=15, level="Moderate"),
-            RiskItem(name="Heat Risk", value=30, level="High"),
-            RiskItem(name="Wildfire Hazard", value=10, level="Low"),
-            RiskItem(name="Wind Damage", value=20, level="Medium")
-        ]
+    bundle = report_bundles.get(address)
+    coords = await bundle.get("coords", lambda: get_coordinates_for_address(address))
+    risk_score_data, flood_zone_data, wildfire_now_data = await asyncio.gather(
+        *(_bundle_fetch(bundle, name, coords) for name in PREVIEW_FETCHES)
     )
+    if not isinstance(risk_score_data, dict) or not risk_score_data.get("scores"):
+        raise RuntimeError(f"Risk scores unavailable for address '{address}'.")
 
-async def generate_pdf_report_service(address: str) -> BytesIO:
-    """Fetches all data, generates charts, AI narrative, and PDF."""
-    logging.info(f"[{address}] Starting generate_pdf_report_service...")
-    coords = await get_coordinates_for_address(address)
-    lat, lon = coords["lat"], coords["lon"]
+    scores = _risk_scores(risk_score_data)
+    risks = []
+    for label, key in PREVIEW_RISKS:
+        value = scores.get(key, 0.0)
+        risks.append(RiskItem(name=label, value=round(value * 10), level=_map_risk_to_level(value, RISK_THRESHOLDS)))
+    overall_risk = _map_risk_to_level(_overall_risk_value(scores), RISK_THRESHOLDS)
 
+    summary = f"Based on current climate data for {address}, this location shows {overall_risk.lower()} overall climate risk."
+    flood_zone = _as_dict(flood_zone_data).get("flood_zone")
+    if flood_zone:
+        summary += f" Flood zone: {flood_zone}."
+    fire_class = (_as_dict(wildfire_now_data).get("properties") or {}).get("fire_risk_class")
+    if fire_class:
+        summary += f" Current wildfire risk within 1 km: {fire_class}."
+    degraded = _degradations({"flood_zone": flood_zone_data, "wildfire_now": wildfire_now_data})
+    if degraded:
+        summary += f" Currently unavailable: {', '.join(SOURCE_LABELS[name].lower() for name in degraded)}."
+
+    return ClimatePreview(address=address, overallRisk=overall_risk, summary=summary, risks=risks, degraded=list(degraded))
+
+# Report data sources: task name -> api_client fetcher
+REPORT_FETCHES = {
+    "risk_score": api_client.get_risk_score,
+    "wildfire_ts": api_client.get_wildfire_timeseries,
+    "heat_wind_ts": api_client.get_heat_wind_timeseries,
+    "heat_wind_daily": api_client.get_heat_wind_daily,
+    "aq_daily": api_client.get_air_quality_daily,
+    "flood_zone": api_client.get_flood_zone_current,
+    "wildfire_now": api_client.get_wildfire_current,
+}
+
+# Chart key -> data task it is drawn from
+REPORT_CHARTS = {
+    "risk_bar": "risk_score",
+    "wildfire_ts": "wildfire_ts",
+    "heatwind_scen": "heat_wind_ts",
+    "recent_daily": "heat_wind_daily",
+    "aq_gauges": "aq_daily",
+}
+
+# Fetches the preview needs; the report adds the time series
+PREVIEW_FETCHES = ("risk_score", "flood_zone", "wildfire_now")
+
+async def _bundle_fetch(bundle, name, coords):
+    """Fetch one report data source through the address bundle."""
+    fetch = REPORT_FETCHES[name]
+    # A failed endpoint yields its exception, like gather(return_exceptions=True)
     try:
-        results = await asyncio.gather(
-            api_client.get_risk_score(lat, lon),
-            api_client.get_wildfire_timeseries(lat, lon),
-            api_client.get_heat_wind_timeseries(lat, lon),
-            api_client.get_heat_wind_daily(lat, lon),
-            api_client.get_air_quality_daily(lat, lon),
-            api_client.get_flood_zone_current(lat, lon),
-            api_client.get_wildfire_current(lat, lon),
-            return_exceptions=True
-        )
-        risk_score_data, wildfire_ts_data, heat_wind_ts_data, heat_wind_daily_data, aq_daily_data, flood_zone_data, wildfire_now_data = results
+        return await bundle.get(name, lambda: fetch(coords["lat"], coords["lon"]))
     except Exception as e:
-        logging.warning(f"API calls failed, using mock data: {e}")
-        # Mock data for testing when API quota is exhausted
-        risk_score_data = {"scores": {"air_quality": 6.5, "flood_risk": 3.2, "wildfire_risk": 8.1}}
-        wildfire_ts_data = {"wildfire_risk_timeseries_data": {"2020": {"low": 10, "medium": 15, "high": 5}, "2021": {"low": 12, "medium": 18, "high": 7}}}
-        heat_wind_ts_data = {"heat_wind_timeseries_data": [{"year": 2020, "heatwaves_rcp45": 25, "consecutive_dry_days_rcp45": 45, "extreme_wind_speed_days_rcp45": 8}]}
-        heat_wind_daily_data = {"heat_wind_daily_data": [{"date": "2024-01-01", "wind_speed(m/s)": 12.5, "precipitation(mm)": 2.3}]}
-        aq_daily_data = {"air_quality_timeseries": [{"air_quality_index": 85, "pm2_5": 25.4}]}
-        flood_zone_data = {"flood_zone": "Low Risk"}
-        wildfire_now_data = {"properties": {"fire_risk_class": "Medium"}}
-
-    # Calculate overall risk
-    overall_risk_value = 0
-    if isinstance(risk_score_data, dict) and "scores" in risk_score_data:
-        scores = risk_score_data["scores"]
-        overall_risk_value = sum(scores.values()) / len(scores) if scores else 0
-    
-    logging.info(f"[DATA] Using risk_score_data: {type(risk_score_data)}")
-    logging.info(f"[DATA] Using wildfire_ts_data: {type(wildfire_ts_data)}")
-    logging.info(f"[DATA] Using heat_wind_ts_data: {type(heat_wind_ts_data)}")
-    logging.info(f"[DATA] Using heat_wind_daily_data: {type(heat_wind_daily_data)}")
-    logging.info(f"[DATA] Using aq_daily_data: {type(aq_daily_data)}")
-
-    chart_paths = {}
-    try:
-        # Generate charts
-        if isinstance(risk_score_data, dict):
-            chart_paths["risk_bar"] = visualization.plot_risk_score_bar(risk_score_data)
-        if isinstance(wildfire_ts_data, dict):
-            chart_paths["wildfire_ts"] = visualization.plot_wildfire_timeseries(wildfire_ts_data)
-        if isinstance(heat_wind_ts_data, dict):
-            chart_paths["heatwind_scen"] = visualization.plot_heat_wind_scenarios(heat_wind_ts_data)
-        if isinstance(heat_wind_daily_data, dict):
-            chart_paths["recent_daily"] = visualization.plot_recent_daily_weather(heat_wind_daily_data)
-        if isinstance(aq_daily_data, dict):
-            chart_paths["aq_gauges"] = visualization.plot_air_quality_gauges(aq_daily_data)
-
-        # AI narrative
+        logging.warning(f"{fetch.__name__} failed: {e}")
+        return e
+
+def _fetch_task(bundle, name):
+    async def run(coords):
+        result = await _bundle_fetch(bundle, name, coords)
+        if isinstance(result, Exception):
+            # Returned rather than raised so the report degrades; span() never sees it
+            metrics.STAGE_ERRORS.inc(stage=name)
+        return result
+    return run
+
+# Charts that only draw the tail of their series: chart key -> rows sent to the worker
+CHART_WINDOWS = {"recent_daily": 30}
+
+def _chart_task(chart_key):
+    async def run(data):
+        # Failed fetches arrive as exceptions; time series as timeseries.TimeSeries
+        if data is None or isinstance(data, BaseException):
+            return None
+        if chart_key in CHART_WINDOWS and hasattr(data, "tail"):
+            data = data.tail(CHART_WINDOWS[chart_key])  # a view; only these rows are pickled
+        return await chart_renderer.render_chart(chart_key, data)
+    return run
+
+def _as_dict(data) -> dict:
+    return data if isinstance(data, dict) else {}
+
+report_flight = SingleFlight("report")
+
+async def generate_report(address: str) -> dict:
+    """
+    Fetches all data, generates charts, AI narrative, and PDF.
+    Returns {"pdf": bytes, "degraded": {source: reason}} where `degraded` names
+    the data sources and charts missing from the report.
+    Concurrent requests for the same canonical address share one pipeline run.
+    """
+    return await report_flight.do(normalize_address(address), lambda: _generate_pdf_report(address))
+
+async def generate_pdf_report_service(address: str) -> bytearray:
+    """The report PDF alone; missing data is noted on its cover."""
+    return (await generate_report(address))["pdf"]
+
+async def _generate_pdf_report(address: str) -> dict:
+    """
+    Runs the report pipeline for one address.
+
+    The stages run as a task graph: the LLM call starts as soon as the risk
+    score, flood zone and current wildfire responses arrive, while the
+    time-series fetches and chart rendering continue alongside it.
+    """
+    logging.info(f"[{address}] Starting generate_pdf_report_service...")
+    # Each node is timed as its own stage (geocode, each fetch, chart:*, narrative, pdf)
+    graph = TaskGraph(instrument=metrics.span)
+    # Data a preview already fetched for this address is reused, not refetched
+    bundle = report_bundles.get(address)
+    logging.info(f"[{address}] Reusing bundled data: {bundle.loaded() or 'none'}")
+
+    async def geocode():
+        return await bundle.get("coords", lambda: get_coordinates_for_address(address))
+
+    async def narrative(coords, risk_score_data, flood_zone_data, wildfire_now_data):
+        # The prompt only needs chart names; charts that later fail to render are skipped by build_pdf
+        expected_charts = {key: True for key in REPORT_CHARTS}
+        if not isinstance(risk_score_data, dict):
+            expected_charts.pop("risk_bar")
         ai_writer = AIWriter()
-        narrative = ai_writer.generate_sections(
-            lat=lat, lon=lon, address=address,
-            risk_score=risk_score_data if isinstance(risk_score_data, dict) else {},
-            flood_zone=flood_zone_data if isinstance(flood_zone_data, dict) else {},
-            wildfire_now=wildfire_now_data if isinstance(wildfire_now_data, dict) else {},
-            **chart_paths
+        return await ai_writer.generate_sections(
+            lat=coords["lat"], lon=coords["lon"], address=address,
+            risk_score=_as_dict(risk_score_data),
+            flood_zone=_as_dict(flood_zone_data),
+            wildfire_now=_as_dict(wildfire_now_data),
+            **expected_charts
         )
 
+    async def availability(*fetched):
+        return _degradations(dict(zip(REPORT_FETCHES, fetched)))
+
+    async def pdf(coords, risk_score_data, narrative_data, degraded, *chart_images):
+        overall_risk_value = _overall_risk_value(_risk_scores(risk_score_data))
+
+        charts = {key: image for key, image in zip(REPORT_CHARTS, chart_images) if image}
+        logging.info(f"[{address}] Charts rendered: {sorted(charts)}")
+        for chart_key, data_task in REPORT_CHARTS.items():
+            if chart_key not in charts and data_task not in degraded:
+                degraded[f"chart:{chart_key}"] = "chart failed to render"
+        if degraded:
+            logging.warning(f"[{address}] Degraded report, missing: {sorted(degraded)}")
+
         # Build PDF
-        pdf_buffer = build_pdf(
-            lat=lat,
-            lon=lon,
+        return await asyncio.to_thread(
+            build_pdf,
+            lat=coords["lat"],
+            lon=coords["lon"],
             address=address,
             overall_risk_value=overall_risk_value,
             risks=[],  # Risks are now inside narrative & charts
-            charts=chart_paths,
-            narrative=narrative
+            charts=charts,
+            narrative=narrative_data,
+            degraded=degraded
         )
-        return pdf_buffer
-
-    finally:
-        # Cleanup
-        for path in chart_paths.values():
-            try:
-                os.remove(path)
-            except OSError as e:
-                logging.error(f"Error removing temporary file {path}: {e}")
+
+    graph.add("geocode", geocode)
+    for name in REPORT_FETCHES:
+        graph.add(name, _fetch_task(bundle, name), "geocode")
+    for chart_key, data_task in REPORT_CHARTS.items():
+        graph.add(f"chart:{chart_key}", _chart_task(chart_key), data_task)
+    graph.add("narrative", narrative, "geocode", "risk_score", "flood_zone", "wildfire_now")
+    graph.add("availability", availability, *REPORT_FETCHES)
+    graph.add("pdf", pdf, "geocode", "risk_score", "narrative", "availability", *(f"chart:{key}" for key in REPORT_CHARTS))
+
+    with metrics.span("report", address=address):
+        results = await graph.run("pdf", "availability")
+    metrics.PDF_BYTES.observe(len(results["pdf"]))
+    return {"pdf": results["pdf"], "degraded": results["availability"]}
@@ -0,0 +1,112 @@
+import os
+import math
+import time
+from collections import OrderedDict, defaultdict
+
+# Coarse-resolution EnviroTrust products (wildfire history, heat/wind climate
+# scenarios) return identical values for properties a few hundred metres
+# apart. For those endpoints a response fetched for a nearby property is
+# reused if it lies within the endpoint's radius and is still fresh.
+EARTH_RADIUS_M = 6_371_000
+METRES_PER_DEG_LAT = 111_320
+
+NEIGHBOUR_RADII_M = {
+    "/api/wildfire/timeseries": float(os.getenv("NEIGHBOUR_RADIUS_WILDFIRE_TS_M", "500")),
+    "/api/heat-wind/timeseries": float(os.getenv("NEIGHBOUR_RADIUS_HEATWIND_TS_M", "2000")),
+}
+MAX_ENTRIES = int(os.getenv("NEIGHBOUR_INDEX_MAX_ENTRIES", "20000"))
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class SpatialIndex:
+    """
+    Per-endpoint grid index of fetched payloads. Grid cells are one search
+    radius tall, so a lookup only scans the cells around the query point.
+    Payloads are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, radii: dict = None, max_entries: int = MAX_ENTRIES):
+        self.radii = {path: r for path, r in (NEIGHBOUR_RADII_M if radii is None else radii).items() if r > 0}
+        self.max_entries = max_entries
+        self._cells = defaultdict(dict)  # path -> {(row, col): {point: entry}}
+        self._order = OrderedDict()      # (path, cell, point) in insertion order, for eviction
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+
+    def eligible(self, path: str) -> bool:
+        return path in self.radii
+
+    def _cell_deg(self, path: str) -> float:
+        return self.radii[path] / METRES_PER_DEG_LAT
+
+    def _cell(self, path: str, lat: float, lon: float) -> tuple:
+        size = self._cell_deg(path)
+        return math.floor(lat / size), math.floor(lon / size)
+
+    def get(self, path: str, lat: float, lon: float):
+        """Payload of the nearest fresh neighbour within the endpoint's radius, or None."""
+        if not self.eligible(path):
+            return None
+        radius = self.radii[path]
+        row, col = self._cell(path, lat, lon)
+        # A degree of longitude shrinks with latitude, so search more columns away from the equator
+        col_span = math.ceil(1 / max(math.cos(math.radians(lat)), 0.01))
+        cells = self._cells[path]
+        now = time.monotonic()
+        best, best_distance = None, radius
+        expired = []
+        for r in (row - 1, row, row + 1):
+            for c in range(col - col_span, col + col_span + 1):
+                for point, (payload, expires_at) in cells.get((r, c), {}).items():
+                    if expires_at <= now:
+                        expired.append(((r, c), point))
+                        continue
+                    distance = haversine_m(lat, lon, *point)
+                    if distance <= best_distance:
+                        best, best_distance = payload, distance
+        for cell, point in expired:
+            self._drop(path, cell, point)
+        if best is None:
+            self._misses[path] += 1
+        else:
+            self._hits[path] += 1
+        return best
+
+    def put(self, path: str, lat: float, lon: float, payload, ttl: float):
+        if not self.eligible(path) or ttl <= 0:
+            return
+        point = (round(float(lat), 6), round(float(lon), 6))
+        cell = self._cell(path, *point)
+        now = time.monotonic()
+        self._cells[path].setdefault(cell, {})[point] = (payload, now + ttl)
+        key = (path, cell, point)
+        self._order[key] = None
+        self._order.move_to_end(key)
+        # Drop expired entries from the old end, then the oldest ones past the size limit
+        while self._order:
+            old_key = next(iter(self._order))
+            entry = self._cells[old_key[0]].get(old_key[1], {}).get(old_key[2])
+            if len(self._order) <= self.max_entries and entry is not None and entry[1] > now:
+                break
+            self._drop(*old_key)
+
+    def _drop(self, path: str, cell: tuple, point: tuple):
+        self._order.pop((path, cell, point), None)
+        bucket = self._cells[path].get(cell, {})
+        bucket.pop(point, None)
+        if not bucket:
+            self._cells[path].pop(cell, None)
+
+    def stats(self) -> dict:
+        per_path = {
+            path: {"radius_m": radius, "hits": self._hits[path], "misses": self._misses[path]}
+            for path, radius in self.radii.items()
+        }
+        return {"entries": len(self._order), "endpoints": per_path}
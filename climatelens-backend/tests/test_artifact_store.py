@@ -0,0 +1,119 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import artifact_store
+from artifact_store import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(root=str(tmp_path / "artifacts"), max_bytes=100, ttl=60, grace=0)
+
+
+def test_put_and_lookup_by_key(store):
+    artifact = store.put("1 main st", b"%PDF one")
+    assert artifact["etag"] == f'"{artifact["digest"]}"'
+    with open(artifact["path"], "rb") as f:
+        assert f.read() == b"%PDF one"
+    assert store.lookup("1 main st") == artifact
+    assert store.lookup("2 main st") is None
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_identical_pdfs_share_one_file(store):
+    first = store.put("1 main st", b"%PDF same")
+    second = store.put("2 main st", b"%PDF same")
+    assert first["path"] == second["path"]
+    assert store.stats()["artifacts"] == 1
+
+
+def test_unaliased_put_is_stored_but_not_looked_up(store):
+    kept = store.put("1 main st", b"%PDF full")
+    degraded = store.put("1 main st", b"%PDF degraded", alias=False)
+    assert os.path.exists(degraded["path"])
+    # The key still points at the last complete report
+    assert store.lookup("1 main st") == kept
+
+
+def test_stale_and_missing_files_miss(store):
+    artifact = store.put("1 main st", b"%PDF one")
+    store.ttl = -1
+    assert store.lookup("1 main st") is None
+    store.ttl = 60
+    os.remove(artifact["path"])
+    assert store.lookup("1 main st") is None
+
+
+def test_eviction_keeps_files_for_the_grace_period(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"), max_bytes=100, ttl=60, grace=600)
+    old = store.put("old", b"a" * 60)
+    store.put("new", b"b" * 60)
+    assert store.lookup("old") is None
+    assert store.evictions == 1
+    assert os.path.exists(old["path"])
+    store.grace = 0
+    store.put("newer", b"c" * 30)
+    assert not os.path.exists(old["path"])
+    assert store.stats()["bytes"] == 90
+
+
+def test_evicted_pdf_stored_again_is_not_reaped(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"), max_bytes=100, ttl=60, grace=600)
+    old = store.put("old", b"a" * 60)
+    store.put("new", b"b" * 60)
+    store.put("old", b"a" * 60)
+    store.grace = 0
+    store.put("small", b"c")
+    assert os.path.exists(old["path"])
+    assert store.lookup("old") is not None
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    import main
+
+    reports = []
+
+    async def fake_report(address):
+        reports.append(address)
+        degraded = {"flood_zone": "timeout"} if "Flood" in address else {}
+        return {"pdf": bytearray(b"%PDF " + address.encode()), "degraded": degraded}
+
+    monkeypatch.setattr(artifact_store, "_store", store)
+    monkeypatch.setattr(main, "generate_report", fake_report)
+    return TestClient(main.app), reports
+
+
+def test_download_is_served_from_the_store(client):
+    client, reports = client
+    first = client.get("/report/download", params={"address": "1 Main Street"})
+    assert first.status_code == 200
+    assert first.content == b"%PDF 1 Main Street"
+    etag = first.headers["etag"]
+    again = client.get("/report/download", params={"address": "1 main st"})
+    assert again.content == first.content
+    assert again.headers["etag"] == etag
+    assert reports == ["1 Main Street"]
+
+
+def test_download_revalidates_with_etag(client):
+    client, _ = client
+    etag = client.get("/report/download", params={"address": "1 Main Street"}).headers["etag"]
+    for header in (etag, f'"other", W/{etag}', "*"):
+        response = client.get("/report/download", params={"address": "1 Main Street"}, headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+    response = client.get("/report/download", params={"address": "1 Main Street"}, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_degraded_download_is_served_once(client):
+    client, reports = client
+    for _ in range(2):
+        response = client.get("/report/download", params={"address": "1 Flood Lane"})
+        assert response.status_code == 200
+        assert response.headers["x-report-degraded"] == "flood_zone"
+    assert reports == ["1 Flood Lane", "1 Flood Lane"]
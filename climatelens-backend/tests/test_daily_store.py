@@ -0,0 +1,63 @@
+import asyncio
+import sqlite3
+
+import api_client
+import daily_store
+import timeseries
+from daily_store import DailySeriesStore
+from response_cache import ResponseCache
+
+PATH = "/api/heat-wind/daily"
+KEY = "heat_wind_daily_data"
+
+
+def _series(*days) -> timeseries.TimeSeries:
+    return timeseries.from_payload(KEY, {KEY: [{"date": day, "wind": float(n)} for n, day in enumerate(days)]})
+
+
+def test_store_round_trip_and_staleness(tmp_path):
+    store = DailySeriesStore(path=str(tmp_path / "daily.sqlite3"), max_stale=100)
+    store.put(PATH, (1, 2), _series("2024-01-01", "2024-01-02"))
+    series, fresh = store.get(PATH, (1, 2), ttl=60)
+    assert fresh and series["wind"].tolist() == [0.0, 1.0]
+    assert store.get(PATH, (1, 3), ttl=60) is None
+    # Read back from SQLite by another process's store
+    other = DailySeriesStore(path=store.path, max_stale=100)
+    assert other.get(PATH, (1, 2), ttl=-1)[1] is False
+    assert other.get(PATH, (1, 2), ttl=-200) is None
+
+
+def test_cell_keyed_table_is_replaced(tmp_path):
+    path = str(tmp_path / "daily.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE daily_series (path TEXT, lat_cell INTEGER, lon_cell INTEGER)")
+    conn.close()
+    DailySeriesStore(path=path)
+    conn = sqlite3.connect(path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert tables == {"daily_location_series"}
+
+
+def test_nearby_properties_get_their_own_series(tmp_path, monkeypatch):
+    fetched = []
+
+    async def fake_get(path, params):
+        fetched.append((params["latitude"], params["longitude"]))
+        return {KEY: [{"date": "2024-01-01", "wind": params["latitude"]}]}
+
+    monkeypatch.setattr(api_client, "_get", fake_get)
+    monkeypatch.setattr(api_client, "response_cache", ResponseCache())
+    monkeypatch.setattr(daily_store, "_store", DailySeriesStore(path=str(tmp_path / "daily.sqlite3")))
+
+    async def main():
+        a = await api_client._get_daily(PATH, 51.5, -0.12)
+        b = await api_client._get_daily(PATH, 51.501, -0.12)  # ~110 m away, same 1 km cell
+        again = await api_client._get_daily(PATH, 51.5, -0.12)
+        return a, b, again
+
+    a, b, again = asyncio.run(main())
+    assert a["wind"].tolist() == [51.5]
+    assert b["wind"].tolist() == [51.501]
+    assert again["wind"].tolist() == [51.5]
+    assert fetched == [(51.5, -0.12), (51.501, -0.12)]
@@ -0,0 +1,19 @@
+from geocoding import GeocodeCache, normalize_address
+
+
+def test_normalize_address_abbreviates_street_words():
+    assert normalize_address("12 Baker Street, London") == normalize_address("12 baker st london")
+    assert normalize_address("  5 North-West   Avenue ") == "5 n w ave"
+
+
+def test_saint_and_street_stay_distinct():
+    assert normalize_address("Saint Paul Rd") != normalize_address("Street Paul Rd")
+
+
+def test_cache_round_trip_and_lru_bound(tmp_path):
+    cache = GeocodeCache(path=str(tmp_path / "geocode.sqlite3"), lru_size=2)
+    for n in range(3):
+        cache.put(f"{n} Main Street", {"lat": float(n), "lon": -float(n)})
+    assert len(cache._lru) == 2
+    # Evicted from the LRU, still served from SQLite
+    assert cache.get("0 main st") == {"lat": 0.0, "lon": -0.0}
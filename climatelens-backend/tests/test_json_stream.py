@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from json_stream import StreamingJSONParser
+
+DOCUMENT = {
+    "summary": {"title": "Risk – Zürich 🌍", "paragraphs": ["Line one\nline two", 'Quote "x" and \\ slash']},
+    "scores": [1, 2.5, None, True, {"nested": {"deep": ["}", "{", "]"]}}],
+    "count": 12,
+    "label": "brace } in a string",
+}
+
+
+def _parse(chunks, on_member=None) -> StreamingJSONParser:
+    parser = StreamingJSONParser(on_member=on_member)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+def _split(text: str, size: int) -> list:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_any_chunking_decodes_the_same_object(size, ensure_ascii):
+    # ensure_ascii splits \uXXXX escapes and surrogate pairs across chunks
+    text = json.dumps(DOCUMENT, ensure_ascii=ensure_ascii)
+    assert _parse(_split(text, size)).result() == DOCUMENT
+
+
+def test_members_are_reported_as_they_complete():
+    seen = []
+    parser = StreamingJSONParser(on_member=lambda key, value: seen.append(key))
+    parser.feed('{"a": {"x": [1, {"y": 2}]}, "b')
+    assert seen == ["a"]
+    parser.feed('": "two", "c": 3')
+    assert seen == ["a", "b"]
+    parser.feed("}")
+    assert seen == ["a", "b", "c"]
+    assert parser.result() == {"a": {"x": [1, {"y": 2}]}, "b": "two", "c": 3}
+
+
+def test_escaped_quotes_and_backslashes_split_across_chunks():
+    parser = _parse(['{"k\\"ey": "a\\', '"b\\\\', '", "n": "\\u00', 'e9"}'])
+    assert parser.result() == {'k"ey': 'a"b\\', "n": "é"}
+
+
+def test_think_block_and_preamble_are_skipped():
+    chunks = ["Sure. <thi", "nk>{\"not\": 1} ", "still thinking</th", "ink>\nHere: ", '{"a"', ": 1}", " trailing {"]
+    assert _parse(chunks).result() == {"a": 1}
+
+
+def test_truncated_stream_is_incomplete():
+    parser = _parse(['{"a": 1, "b": {"c": [1, 2'])
+    assert not parser.done
+    with pytest.raises(ValueError, match="incomplete"):
+        parser.result()
+
+
+def test_missing_object_is_incomplete():
+    with pytest.raises(ValueError):
+        _parse(["no json here", "<think>{}"]).result()
+
+
+def test_invalid_member_raises():
+    with pytest.raises(ValueError, match="'b'"):
+        _parse(['{"a": 1, "b": tru, "c": 2}'])
+
+
+def test_on_member_can_abort_the_stream():
+    def reject(key, value):
+        if key == "bad":
+            raise RuntimeError(key)
+
+    parser = StreamingJSONParser(on_member=reject)
+    parser.feed('{"ok": 1, ')
+    with pytest.raises(RuntimeError):
+        parser.feed('"bad": 2, "later": 3}')
+
+
+def test_only_the_current_member_is_retained():
+    parser = StreamingJSONParser()
+    parser.feed("{")
+    for n in range(200):
+        parser.feed(f'"k{n}": "{"x" * 50}", ')
+    assert sum(len(chunk) for chunk in parser.chunks) < 100
+    parser.feed('"last": 0}')
+    assert len(parser.result()) == 201
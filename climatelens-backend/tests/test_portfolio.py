@@ -0,0 +1,28 @@
+import pytest
+
+from portfolio import parse_addresses
+
+
+def _csv(text: str) -> list:
+    return parse_addresses(text.encode("utf-8"), "text/csv")
+
+
+def test_csv_address_column_need_not_be_first():
+    text = "id,address,notes\n1,1 Main Street,\n,2 High Street,no id\n3,,blank address\n"
+    assert _csv(text) == ["1 Main Street", "2 High Street"]
+
+
+def test_csv_header_with_blank_first_cell():
+    assert _csv(",Address\n,1 Main Street\n\n,2 High Street\n") == ["1 Main Street", "2 High Street"]
+
+
+def test_csv_without_header_uses_first_column():
+    body = "1 Main Street,x\n\n2 High Street\n".encode("utf-8-sig")
+    assert parse_addresses(body, "text/csv") == ["1 Main Street", "2 High Street"]
+
+
+def test_json_shapes():
+    assert parse_addresses(b'["1 Main Street", " "]', "application/json") == ["1 Main Street"]
+    assert parse_addresses(b'{"addresses": [{"address": "2 High Street"}]}', None) == ["2 High Street"]
+    with pytest.raises(ValueError, match="Address 1 must be a string"):
+        parse_addresses(b'["1 Main Street", 5]', "application/json")
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import report_bundle
+import services
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake geocoder and preview endpoints; counts calls per source."""
+    calls = {}
+    responses = {
+        "risk_score": {"scores": {"flood_risk": 8.0, "air_quality": None, "wildfire_risk": "2.0"}},
+        "flood_zone": {"flood_zone": "AE"},
+        "wildfire_now": {"properties": {"fire_risk_class": "low"}},
+    }
+
+    def fake(name):
+        async def fetch(lat, lon):
+            calls[name] = calls.get(name, 0) + 1
+            response = responses[name]
+            if isinstance(response, Exception):
+                raise response
+            return response
+        fetch.__name__ = name
+        return fetch
+
+    async def geocode(address):
+        calls["coords"] = calls.get("coords", 0) + 1
+        return {"lat": 51.5, "lon": -0.12}
+
+    monkeypatch.setattr(services, "get_coordinates_for_address", geocode)
+    monkeypatch.setattr(services, "REPORT_FETCHES", {**services.REPORT_FETCHES, **{name: fake(name) for name in responses}})
+    monkeypatch.setattr(services, "report_bundles", report_bundle.BundleCache())
+    return calls, responses
+
+
+def test_overall_risk_skips_missing_scores():
+    scores = services._risk_scores({"scores": {"a": 8, "b": None, "c": "2", "d": "n/a"}})
+    assert scores == {"a": 8.0, "c": 2.0}
+    assert services._overall_risk_value(scores) == 5.0
+    assert services._overall_risk_value(services._risk_scores(ValueError("down"))) == 0.0
+
+
+def test_preview_items_and_overall_level(upstream):
+    preview = asyncio.run(services.fetch_climate_preview("1 Main Street"))
+    assert [(risk.name, risk.value, risk.level) for risk in preview.risks] == [
+        ("Flood Risk", 80, "High"),
+        ("Air Quality", 0, "Low"),
+        ("Wildfire Hazard", 20, "Low"),
+    ]
+    # Same value the PDF uses: mean of 8.0 and 2.0
+    assert preview.overallRisk == services._map_risk_to_level(5.0, services.RISK_THRESHOLDS) == "Moderate"
+    assert "Flood zone: AE." in preview.summary
+    assert preview.degraded == []
+
+
+def test_preview_reports_unavailable_sources(upstream):
+    _, responses = upstream
+    responses["flood_zone"] = RuntimeError("timeout")
+    preview = asyncio.run(services.fetch_climate_preview("1 Main Street"))
+    assert preview.degraded == ["flood_zone"]
+    assert "unavailable: flood zone" in preview.summary
+
+
+def test_preview_requires_risk_scores(upstream):
+    _, responses = upstream
+    responses["risk_score"] = {"scores": {}}
+    with pytest.raises(RuntimeError, match="Risk scores unavailable"):
+        asyncio.run(services.fetch_climate_preview("1 Main Street"))
+
+
+def test_download_reuses_what_the_preview_fetched(upstream):
+    calls, _ = upstream
+
+    async def main():
+        await services.fetch_climate_preview("1 Main Street")
+        # The report looks the bundle up by normalized address
+        bundle = services.report_bundles.get("1 main st")
+        coords = await bundle.get("coords", lambda: services.get_coordinates_for_address("1 main st"))
+        risk = await services._bundle_fetch(bundle, "risk_score", coords)
+        return bundle.loaded(), risk
+
+    loaded, risk = asyncio.run(main())
+    assert loaded == ["coords", "flood_zone", "risk_score", "wildfire_now"]
+    assert risk["scores"]["flood_risk"] == 8.0
+    assert calls == {"coords": 1, "risk_score": 1, "flood_zone": 1, "wildfire_now": 1}
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from report_bundle import BundleCache, ReportBundle
+
+
+def _counter(result=None, error=None, delay=0.0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+    return fetch, calls
+
+
+def test_bundle_fetches_each_item_once():
+    bundle = ReportBundle("1 Main Street")
+    fetch, calls = _counter({"scores": {}}, delay=0.01)
+
+    async def main():
+        first = await asyncio.gather(bundle.get("risk", fetch), bundle.get("risk", fetch))
+        return first, await bundle.get("risk", fetch)
+
+    (a, b), c = asyncio.run(main())
+    assert a is b is c
+    assert len(calls) == 1
+    assert bundle.loaded() == ["risk"]
+
+
+def test_failed_fetch_is_retried_by_the_next_caller():
+    bundle = ReportBundle("1 Main Street")
+    failing, failed_calls = _counter(error=RuntimeError("down"))
+    working, calls = _counter("ok")
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await bundle.get("risk", failing)
+        assert bundle.loaded() == []
+        return await bundle.get("risk", working)
+
+    assert asyncio.run(main()) == "ok"
+    assert (len(failed_calls), len(calls)) == (1, 1)
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    bundle = ReportBundle("1 Main Street")
+    fetch, calls = _counter("ok", delay=0.02)
+
+    async def main():
+        first = asyncio.ensure_future(bundle.get("risk", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(bundle.get("risk", fetch))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "ok"
+    assert len(calls) == 1
+
+
+def test_cache_shares_bundles_by_normalized_address():
+    cache = BundleCache(ttl=60)
+    bundle = cache.get("12 Baker Street, London")
+    assert cache.get("12 baker st london") is bundle
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_expired_bundles_are_replaced():
+    cache = BundleCache(ttl=60)
+    bundle = cache.get("1 Main Street")
+    bundle.created_at -= 59
+    assert cache.get("1 Main Street") is bundle
+    bundle.created_at -= 2
+    assert cache.get("1 Main Street") is not bundle
+    assert cache.stats()["entries"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = BundleCache(ttl=60, max_entries=2)
+    first = cache.get("1 Main Street")
+    cache.get("2 Main Street")
+    assert cache.get("1 Main Street") is first
+    cache.get("3 Main Street")
+    assert cache.get("1 Main Street") is first
+    assert cache.stats()["misses"] == 3
+    cache.get("2 Main Street")
+    assert cache.stats()["misses"] == 4
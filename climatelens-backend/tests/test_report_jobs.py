@@ -0,0 +1,167 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+import pytest
+
+import report_jobs
+from report_jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue, ReportWorkerPool
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"), results_dir=str(tmp_path / "results"))
+
+
+def _expire(queue, job_id):
+    conn = sqlite3.connect(queue.path)
+    with conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time() - 2 * report_jobs.JOB_LEASE_SECONDS, job_id))
+    conn.close()
+
+
+def test_claim_takes_highest_priority_then_oldest(queue):
+    low = queue.submit("1 Low Street")
+    first = queue.submit("2 High Street", priority=5)
+    second = queue.submit("3 High Street", priority=5)
+    assert queue.position(second) == 1
+    claimed = [queue.claim()["id"] for _ in range(3)]
+    assert claimed == [first, second, low]
+    assert queue.claim() is None
+    job = queue.get(low)
+    assert job["status"] == RUNNING
+    assert job["attempts"] == 1
+    assert job["lease_id"]
+
+
+def test_complete_stores_the_result(queue):
+    job_id = queue.submit("1 Main Street")
+    job = queue.claim()
+    path = queue.complete(job_id, b"%PDF-1.4", job["lease_id"])
+    with open(path, "rb") as f:
+        assert f.read() == b"%PDF-1.4"
+    stored = queue.get(job_id)
+    assert (stored["status"], stored["result_size"], stored["lease_id"]) == (DONE, 8, None)
+    assert [name for name in os.listdir(queue.results_dir) if name.endswith(".tmp")] == []
+
+
+def test_complete_discards_a_result_after_the_lease_moved_on(queue):
+    job_id = queue.submit("1 Main Street")
+    stale = queue.claim()
+    _expire(queue, job_id)
+    assert queue.requeue_expired() == 1
+    current = queue.claim()
+    assert queue.complete(job_id, b"stale", stale["lease_id"]) is None
+    assert not queue.fail(job_id, "stale", stale["lease_id"])
+    assert not queue.heartbeat(job_id, stale["lease_id"])
+    assert queue.get(job_id)["status"] == RUNNING
+    assert os.listdir(queue.results_dir) == []
+    assert queue.complete(job_id, b"fresh", current["lease_id"])
+    assert queue.get(job_id)["status"] == DONE
+
+
+def test_fail_records_the_error(queue):
+    job_id = queue.submit("1 Main Street")
+    job = queue.claim()
+    assert queue.fail(job_id, "upstream down", job["lease_id"])
+    stored = queue.get(job_id)
+    assert (stored["status"], stored["error"]) == (FAILED, "upstream down")
+
+
+def test_requeue_expired_retries_then_fails(queue):
+    job_id = queue.submit("1 Main Street")
+    for attempt in range(1, 3):
+        queue.claim()
+        _expire(queue, job_id)
+        assert queue.requeue_expired(max_attempts=2) == (1 if attempt < 2 else 0)
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert "2 attempts" in job["error"]
+    # A job whose lease is still being extended is left alone
+    live = queue.submit("2 Main Street")
+    queue.claim()
+    assert queue.requeue_expired() == 0
+    assert queue.get(live)["status"] == RUNNING
+
+
+def test_requeue_on_shutdown_does_not_count_an_attempt(queue):
+    job_id = queue.submit("1 Main Street")
+    job = queue.claim()
+    queue.requeue(job_id, job["lease_id"])
+    stored = queue.get(job_id)
+    assert (stored["status"], stored["attempts"], stored["lease_id"]) == (QUEUED, 0, None)
+
+
+class FlakyQueue(JobQueue):
+    """Raises from the first claims, completes and fails, as a locked database or full disk would."""
+
+    def __init__(self, *args, claim_errors=0, complete_errors=0, fail_errors=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.claim_errors = claim_errors
+        self.complete_errors = complete_errors
+        self.fail_errors = fail_errors
+
+    def claim(self):
+        if self.claim_errors:
+            self.claim_errors -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().claim()
+
+    def complete(self, job_id, pdf_bytes, lease_id):
+        if self.complete_errors:
+            self.complete_errors -= 1
+            raise OSError(28, "No space left on device")
+        return super().complete(job_id, pdf_bytes, lease_id)
+
+    def fail(self, job_id, error, lease_id):
+        if self.fail_errors:
+            self.fail_errors -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().fail(job_id, error, lease_id)
+
+
+def _run_pool(queue, monkeypatch, until):
+    import services
+
+    async def fake_report(address):
+        return bytearray(b"%PDF " + address.encode())
+
+    monkeypatch.setattr(services, "generate_pdf_report_service", fake_report)
+    monkeypatch.setattr(report_jobs, "ERROR_BACKOFF", 0.01)
+    monkeypatch.setattr(report_jobs, "POLL_INTERVAL", 0.01)
+
+    async def main():
+        pool = ReportWorkerPool(queue, workers=1)
+        await pool.start()
+        try:
+            for _ in range(200):
+                if queue.get(until)["status"] == DONE:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await pool.stop()
+
+    asyncio.run(main())
+
+
+def test_worker_survives_queue_errors(tmp_path, monkeypatch):
+    queue = FlakyQueue(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "results"), claim_errors=2, complete_errors=1)
+    disk_full = queue.submit("1 Main Street")
+    done = queue.submit("2 Main Street")
+    _run_pool(queue, monkeypatch, until=done)
+    assert queue.claim_errors == 0
+    failed = queue.get(disk_full)
+    assert failed["status"] == FAILED
+    assert "No space left" in failed["error"]
+    assert queue.get(done)["status"] == DONE
+
+
+def test_worker_survives_an_error_while_failing_a_job(tmp_path, monkeypatch):
+    queue = FlakyQueue(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "results"), complete_errors=1, fail_errors=1)
+    stuck = queue.submit("1 Main Street")
+    done = queue.submit("2 Main Street")
+    _run_pool(queue, monkeypatch, until=done)
+    assert queue.get(done)["status"] == DONE
+    # Left running; its lease expires and requeue_expired picks it up
+    assert queue.get(stuck)["status"] == RUNNING
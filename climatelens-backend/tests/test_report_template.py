@@ -0,0 +1,80 @@
+from io import BytesIO
+
+import pytest
+
+import report_template
+import text_layout
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def _render(template, text: str, reuse: bool = None) -> bytes:
+    pdf = template.new_document(reuse)
+    pdf.add_page()
+    template.add_logo(pdf)
+    for style in ("", "B", "I", "BI"):
+        pdf.set_font(report_template.FONT_FAMILY, style, 12)
+        text_layout.write_paragraph(pdf, f"{text} ({style or 'regular'})")
+    return bytes(pdf.output())
+
+
+def _text(pdf_bytes: bytes) -> str:
+    reader = pypdf.PdfReader(BytesIO(pdf_bytes))
+    return "".join(page.extract_text() for page in reader.pages)
+
+
+def test_documents_from_one_template_both_parse():
+    template = report_template.ReportTemplate()
+    first = _render(template, "First report – Zürich")
+    second = _render(template, "Second report – Kraków")
+    assert "First report" in _text(first)
+    assert "Kraków" in _text(second)
+    assert template.reuse
+
+
+def test_shared_and_fresh_documents_match():
+    template = report_template.ReportTemplate()
+    shared = _text(_render(template, "Same text"))
+    fresh = _text(_render(template, "Same text", reuse=False))
+    assert shared == fresh
+
+
+def test_build_pdf_falls_back_when_shared_fonts_fail_at_output(monkeypatch):
+    import services
+
+    template = report_template.ReportTemplate()
+    monkeypatch.setattr(report_template, "_template", template)
+    clone = template._clone_font
+
+    def broken_clone(pdf, fontkey):
+        font = clone(pdf, fontkey)
+        font.ttfont = None  # only fails when the font is subset in output()
+        return font
+
+    monkeypatch.setattr(template, "_clone_font", broken_clone)
+    narrative = {"executive_summary": {"title": "Summary", "subsections": [{"subtitle": "Risk", "paragraphs": ["Text."]}]}}
+    pdf_bytes = services.build_pdf(51.5, -0.12, "1 Test Street", 5, [], {}, narrative)
+    assert "1 Test Street" in _text(bytes(pdf_bytes))
+    assert not template.reuse
+
+
+def test_concurrent_first_calls_build_one_template(monkeypatch):
+    import threading
+
+    built = []
+
+    class CountingTemplate(report_template.ReportTemplate):
+        def __init__(self):
+            built.append(1)
+            super().__init__()
+
+    monkeypatch.setattr(report_template, "_template", None)
+    monkeypatch.setattr(report_template, "ReportTemplate", CountingTemplate)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(report_template.get_template())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(template is results[0] for template in results)
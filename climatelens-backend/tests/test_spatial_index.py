@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+import api_client
+from response_cache import ResponseCache
+from spatial_index import METRES_PER_DEG_LAT, SpatialIndex, haversine_m
+
+PATH = "/api/wildfire/timeseries"
+POINT_PATH = "/api/flood/zone-current"
+
+
+@pytest.fixture
+def index():
+    return SpatialIndex(radii={PATH: 500, "/api/disabled": 0})
+
+
+def _north(lat: float, lon: float, metres: float) -> tuple:
+    return lat + metres / METRES_PER_DEG_LAT, lon
+
+
+def test_haversine_one_degree_of_latitude():
+    assert haversine_m(0, 0, 1, 0) == pytest.approx(111_195, rel=1e-3)
+    assert haversine_m(51.5, -0.12, 51.5, -0.12) == 0
+
+
+def test_only_configured_endpoints_are_eligible(index):
+    assert index.eligible(PATH)
+    assert not index.eligible("/api/disabled")
+    index.put("/api/other", 1.0, 1.0, {"x": 1}, ttl=60)
+    index.put(PATH, 1.0, 1.0, {"x": 1}, ttl=0)
+    assert index.stats()["entries"] == 0
+
+
+def test_neighbour_within_radius_is_reused(index):
+    index.put(PATH, 51.5, -0.12, "a", ttl=60)
+    assert index.get(PATH, *_north(51.5, -0.12, 400)) == "a"
+    assert index.get(PATH, *_north(51.5, -0.12, 600)) is None
+    assert index.stats()["endpoints"][PATH] == {"radius_m": 500, "hits": 1, "misses": 1}
+
+
+def test_nearest_neighbour_wins_across_cells(index):
+    index.put(PATH, *_north(51.5, -0.12, -450), "south", ttl=60)
+    index.put(PATH, *_north(51.5, -0.12, 300), "north", ttl=60)
+    assert index.get(PATH, 51.5, -0.12) == "north"
+    assert index.get(PATH, *_north(51.5, -0.12, -300)) == "south"
+
+
+def test_high_latitude_east_west_neighbours(index):
+    # At 70°N a 450 m step east crosses several longitude cells
+    lat, lon = 70.0, 20.0
+    east = lon + 450 / (METRES_PER_DEG_LAT * 0.342)
+    index.put(PATH, lat, east, "east", ttl=60)
+    assert haversine_m(lat, lon, lat, east) < 500
+    assert index.get(PATH, lat, lon) == "east"
+
+
+def test_expired_entries_are_dropped(index):
+    index.put(PATH, 51.5, -0.12, "old", ttl=60)
+    _, cell, point = next(iter(index._order))
+    index._cells[PATH][cell][point] = ("old", 0.0)
+    assert index.get(PATH, 51.5, -0.12) is None
+    assert index.stats()["entries"] == 0
+    assert not index._cells[PATH]
+
+
+def test_oldest_entries_are_evicted_past_the_limit():
+    index = SpatialIndex(radii={PATH: 500}, max_entries=2)
+    for n in range(3):
+        index.put(PATH, 10.0 + n, 10.0, n, ttl=60)
+    assert index.stats()["entries"] == 2
+    assert index.get(PATH, 10.0, 10.0) is None
+    assert index.get(PATH, 12.0, 10.0) == 2
+
+
+def test_get_point_uses_one_cache_layer_per_endpoint(monkeypatch):
+    calls = []
+
+    async def fake_get(path, params):
+        calls.append(path)
+        return {"path": path, "lat": params["latitude"]}
+
+    monkeypatch.setattr(api_client, "_get", fake_get)
+    monkeypatch.setattr(api_client, "neighbour_index", SpatialIndex(radii={PATH: 500}))
+    monkeypatch.setattr(api_client, "response_cache", ResponseCache())
+
+    async def main():
+        first = await api_client._get_point(PATH, 51.5, -0.12)
+        near = await api_client._get_point(PATH, *_north(51.5, -0.12, 100))
+        await api_client._get_point(POINT_PATH, 51.5, -0.12)
+        await api_client._get_point(POINT_PATH, *_north(51.5, -0.12, 100))
+        return first, near
+
+    first, near = asyncio.run(main())
+    assert near is first
+    # Neighbour-eligible responses are not also written to the response cache
+    assert api_client.response_cache.get(PATH, 51.5, -0.12) is None
+    # Property-specific endpoints are never shared between nearby properties
+    assert calls == [PATH, POINT_PATH, POINT_PATH]
@@ -0,0 +1,62 @@
+import text_layout
+from report_template import get_template
+
+
+def _pdf():
+    pdf = get_template().new_document()
+    pdf.add_page()
+    pdf.set_font("DejaVu", "", 11)
+    return pdf
+
+
+def test_wrap_breaks_on_newlines():
+    lines = text_layout.wrap(_pdf(), "First paragraph\nSecond\r\n\nAfter a blank line", 500)
+    assert [(line, ends) for line, _, _, ends in lines] == [
+        ("First paragraph", True),
+        ("Second", True),
+        ("", True),
+        ("After a blank line", True),
+    ]
+
+
+def test_wrap_fits_lines_and_marks_paragraph_ends():
+    pdf = _pdf()
+    lines = text_layout.wrap(pdf, "word " * 40, 60)
+    assert len(lines) > 1
+    assert all(width <= 60 for _, width, _, _ in lines)
+    assert [ends for *_, ends in lines] == [False] * (len(lines) - 1) + [True]
+    assert all(abs(pdf.get_string_width(line) - width) < 1e-6 for line, width, _, _ in lines)
+
+
+def test_wrap_hyphenates_words_wider_than_a_line():
+    lines = text_layout.wrap(_pdf(), "x" * 80, 30)
+    assert len(lines) > 1
+    assert all(line.endswith(text_layout.HYPHEN) for line, *_ in lines[:-1])
+    assert "".join(line.rstrip(text_layout.HYPHEN) for line, *_ in lines) == "x" * 80
+
+
+def test_write_paragraph_emits_one_line_per_wrapped_line():
+    pdf = _pdf()
+    y = pdf.y
+    text_layout.write_paragraph(pdf, "one\ntwo\nthree", h=6)
+    assert pdf.y - y == 18
+
+
+def test_write_paragraphs_adds_spacing_after_each_paragraph():
+    pdf = _pdf()
+    y = pdf.y
+    text_layout.write_paragraphs(pdf, ["one", "two\nthree", None], h=6, spacing=2, prefix="• ")
+    assert pdf.y - y == 4 * 6 + 3 * 2
+
+
+def test_fallback_to_multi_cell_when_internals_change(monkeypatch):
+    def changed(*args, **kwargs):
+        raise AttributeError("_render_styled_text_line")
+
+    monkeypatch.setattr(text_layout, "_fast_path", True)
+    monkeypatch.setattr(text_layout, "_emit_line", changed)
+    pdf = _pdf()
+    y = pdf.y
+    text_layout.write_paragraphs(pdf, ["one", "two"], h=6, spacing=1)
+    assert pdf.y - y == 2 * 6 + 2 * 1
+    assert text_layout._fast_path is False
@@ -0,0 +1,107 @@
+import pickle
+
+import numpy as np
+
+import timeseries
+
+DAILY = "air_quality_timeseries"
+YEARLY = "heat_wind_timeseries_data"
+
+
+def _daily(rows) -> timeseries.TimeSeries:
+    return timeseries.from_payload(DAILY, {DAILY: rows})
+
+
+def test_from_payload_sorts_rows_and_fills_missing_values():
+    series = _daily([
+        {"date": "2024-01-02", "pm25": 7, "no2": "n/a"},
+        {"date": "2024-01-01T00:00:00", "pm25": 5},
+    ])
+    assert series.index.tolist() == [np.datetime64("2024-01-01"), np.datetime64("2024-01-02")]
+    assert series["pm25"].tolist() == [5.0, 7.0]
+    assert np.isnan(series["no2"]).all()
+    assert timeseries.from_payload(DAILY, {DAILY: "unexpected"}) is None
+
+
+def test_slices_are_views_and_pickle():
+    series = timeseries.from_payload(YEARLY, {YEARLY: [{"year": 2020 + n, "tmax": float(n)} for n in range(5)]})
+    tail = series.tail(2)
+    assert tail.index.tolist() == [2023, 2024]
+    assert np.shares_memory(tail["tmax"], series["tmax"])
+    restored = pickle.loads(pickle.dumps(series))
+    assert restored.names == ["tmax"]
+    np.testing.assert_array_equal(restored["tmax"], series["tmax"])
+
+
+def test_wildfire_mapping_round_trips_to_payload():
+    key = "wildfire_risk_timeseries_data"
+    payload = {key: {"2031": {"latitude": 1.0, "longitude": 2.0, "risk": 0.5}, "2030": {"risk": None}}}
+    series = timeseries.from_payload(key, payload)
+    assert series.index.tolist() == [2030, 2031]
+    assert series.names == ["risk"]
+    assert series.to_payload() == {key: {"2030": {"risk": None}, "2031": {"risk": 0.5}}}
+
+
+def test_to_bytes_round_trip():
+    for series in (
+        _daily([{"date": "2024-01-01", "pm25": 5.5, "o3": None}, {"date": None, "pm25": 1}]),
+        timeseries.from_payload(YEARLY, {YEARLY: [{"year": 2020, "tmax": 30.5}, {"year": "2021", "tmax": 31}]}),
+        _daily([]),
+    ):
+        restored = timeseries.TimeSeries.from_bytes(series.to_bytes())
+        assert restored.key == series.key
+        assert restored.names == series.names
+        assert restored.index.dtype == series.index.dtype
+        np.testing.assert_array_equal(restored.index, series.index)
+        for name in series.names:
+            np.testing.assert_array_equal(restored[name], series[name])
+
+
+def test_from_bytes_views_any_buffer_and_pickles():
+    series = _daily([{"date": "2024-03-01", "pm25": 2}])
+    restored = timeseries.TimeSeries.from_bytes(memoryview(series.to_bytes()))
+    assert not restored["pm25"].flags.writeable
+    assert pickle.loads(pickle.dumps(restored))["pm25"].tolist() == [2.0]
+
+
+def test_merge_prefers_new_values_and_unions_metrics():
+    old = _daily([
+        {"date": "2024-01-01", "pm25": 1, "no2": 10},
+        {"date": "2024-01-02", "pm25": 2, "no2": 20},
+    ])
+    new = _daily([
+        {"date": "2024-01-02", "pm25": 22, "o3": 5},
+        {"date": "2024-01-03", "pm25": 3, "o3": 6},
+    ])
+    merged = timeseries.merge(old, new)
+    assert [str(d) for d in merged.index] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert merged.names == ["pm25", "no2", "o3"]
+    assert merged["pm25"].tolist() == [1.0, 22.0, 3.0]
+    np.testing.assert_array_equal(merged["no2"], [10.0, 20.0, np.nan])
+    np.testing.assert_array_equal(merged["o3"], [np.nan, 5.0, 6.0])
+
+
+def test_merge_drops_undated_rows():
+    old = _daily([{"date": None, "pm25": 9}, {"date": "2024-01-01", "pm25": 1}])
+    new = _daily([{"date": "2024-01-02", "pm25": 2}, {"date": "", "pm25": 8}])
+    merged = timeseries.merge(old, new)
+    assert not np.isnat(merged.index).any()
+    assert merged["pm25"].tolist() == [1.0, 2.0]
+
+
+def test_merge_with_empty_side():
+    series = _daily([{"date": "2024-01-01", "pm25": 1}])
+    assert timeseries.merge(_daily([]), series)["pm25"].tolist() == [1.0]
+    assert timeseries.merge(series, _daily([]))["pm25"].tolist() == [1.0]
+
+
+def test_malformed_dates_become_undated_rows():
+    series = _daily([
+        {"date": "2024-01-02", "pm25": 2},
+        {"date": "yesterday", "pm25": 9},
+        {"date": "2024-13-01", "pm25": 8},
+        {"date": "2024-01-01", "pm25": 1},
+    ])
+    assert [str(d) for d in series.index] == ["2024-01-01", "2024-01-02", "NaT", "NaT"]
+    assert series["pm25"].tolist() == [1.0, 2.0, 9.0, 8.0]
+    assert timeseries.merge(series, _daily([]))["pm25"].tolist() == [1.0, 2.0]
@@ -0,0 +1,237 @@
+import asyncio
+
+import pytest
+
+from upstream_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, LatencyTracker, UpstreamHealth
+
+ENDPOINT = "/api/test"
+
+
+def _warm(health: UpstreamHealth, seconds: float, samples: int = 20):
+    for _ in range(samples):
+        health.latency(ENDPOINT).observe(seconds)
+
+
+def _expire(breaker: CircuitBreaker):
+    breaker.opened_at -= breaker.cooldown
+
+
+def test_latency_percentile_needs_min_samples():
+    tracker = LatencyTracker(window=10, min_samples=3)
+    tracker.observe(0.1)
+    tracker.observe(0.2)
+    assert tracker.percentile(50) is None
+    tracker.observe(0.3)
+    assert tracker.percentile(50) == 0.2
+    assert tracker.percentile(99) == 0.3
+
+
+def test_latency_window_drops_old_samples():
+    tracker = LatencyTracker(window=3, min_samples=1)
+    for seconds in (5.0, 0.1, 0.1, 0.1):
+        tracker.observe(seconds)
+    assert tracker.percentile(100) == 0.1
+
+
+def test_breaker_opens_after_threshold_consecutive_failures():
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    assert breaker.failure() is False
+    assert breaker.failure() is False
+    breaker.success()
+    assert breaker.failure() is False
+    assert breaker.failure() is False
+    assert breaker.state == CLOSED
+    assert breaker.failure() is True
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+    assert breaker.rejected == 1
+
+
+def test_breaker_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    _expire(breaker)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is False
+    breaker.success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow() is True
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    _expire(breaker)
+    assert breaker.allow() is True
+    assert breaker.failure() is True
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+
+
+def test_breaker_release_lets_another_probe_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    _expire(breaker)
+    assert breaker.allow() is True
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
+
+
+def test_check_raises_while_open():
+    health = UpstreamHealth("test")
+    for _ in range(health.breaker(ENDPOINT).threshold):
+        health.record_failure(ENDPOINT)
+    with pytest.raises(CircuitOpenError):
+        health.check(ENDPOINT)
+    assert health.stats()[ENDPOINT]["rejected"] == 1
+
+
+def test_timeout_adapts_to_p99_within_bounds():
+    health = UpstreamHealth("test")
+    assert health.timeout(ENDPOINT, 15.0) == 15.0
+    _warm(health, 1.0)
+    assert health.timeout(ENDPOINT, 15.0) == 3.0
+    assert health.timeout(ENDPOINT, 2.5) == 2.5
+
+
+def test_timeout_is_the_ceiling_unless_closed():
+    health = UpstreamHealth("test")
+    _warm(health, 1.0)
+    breaker = health.breaker(ENDPOINT)
+    breaker.failure()
+    breaker.state = HALF_OPEN
+    assert health.timeout(ENDPOINT, 15.0) == 15.0
+
+
+def test_hedged_without_samples_makes_one_call():
+    health = UpstreamHealth("test")
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return "ok"
+
+    assert asyncio.run(health.hedged(ENDPOINT, call)) == "ok"
+    assert len(calls) == 1
+    assert health.stats()[ENDPOINT]["hedged"] == 0
+
+
+def test_hedged_duplicate_wins_and_slow_call_is_cancelled():
+    health = UpstreamHealth("test")
+    _warm(health, 0.01)
+    started, cancelled = [], []
+
+    async def call():
+        attempt = len(started)
+        started.append(attempt)
+        try:
+            await asyncio.sleep(1.0 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return attempt
+
+    async def run():
+        result = await health.hedged(ENDPOINT, call)
+        await asyncio.sleep(0)  # let the cancelled call unwind
+        return result
+
+    assert asyncio.run(run()) == 1
+    assert cancelled == [0]
+    assert health.stats()[ENDPOINT]["hedged"] == 1
+
+
+def test_hedged_records_caller_observed_latency():
+    health = UpstreamHealth("test", hedge_percentile=0)
+    tracker = health.latency(ENDPOINT)
+    tracker.min_samples = 1
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    asyncio.run(health.hedged(ENDPOINT, call))
+    assert tracker.percentile(100) >= 0.05
+
+
+def test_hedged_records_timeouts_but_not_other_errors():
+    health = UpstreamHealth("test", hedge_percentile=0)
+    tracker = health.latency(ENDPOINT)
+    tracker.min_samples = 1
+
+    async def fails():
+        raise ValueError("bad response")
+
+    async def times_out():
+        await asyncio.sleep(0.02)
+        raise TimeoutError("slow")
+
+    with pytest.raises(ValueError):
+        asyncio.run(health.hedged(ENDPOINT, fails, timeouts=(TimeoutError,)))
+    assert tracker.percentile(100) is None
+    with pytest.raises(TimeoutError):
+        asyncio.run(health.hedged(ENDPOINT, times_out, timeouts=(TimeoutError,)))
+    assert tracker.percentile(100) >= 0.02
+
+
+def test_hedged_raises_when_both_calls_fail():
+    health = UpstreamHealth("test")
+    _warm(health, 0.01)
+    started = []
+
+    async def call():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError(f"attempt {len(started)}")
+
+    with pytest.raises(ValueError):
+        asyncio.run(health.hedged(ENDPOINT, call))
+    assert len(started) == 2
+
+
+def test_no_hedge_while_half_open():
+    health = UpstreamHealth("test")
+    _warm(health, 0.01)
+    breaker = health.breaker(ENDPOINT)
+    for _ in range(breaker.threshold):
+        breaker.failure()
+    _expire(breaker)
+    health.check(ENDPOINT)
+    assert breaker.state == HALF_OPEN
+    assert health.hedge_delay(ENDPOINT) is None
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    asyncio.run(health.hedged(ENDPOINT, call))
+    assert len(calls) == 1
+
+
+def test_cancelling_the_caller_cancels_every_call():
+    health = UpstreamHealth("test")
+    _warm(health, 0.01)
+    cancelled = []
+
+    async def call():
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def run():
+        task = asyncio.create_task(health.hedged(ENDPOINT, call))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert len(cancelled) == 2
@@ -0,0 +1,158 @@
+import logging
+from fpdf.enums import Align, XPos, YPos
+from fpdf.line_break import TextLine
+
+HYPHEN = "-"
+
+# Lines are emitted through fpdf2 internals (see _emit_line), written against
+# the fpdf2 2.8 series that pyproject.toml pins. If they change anyway,
+# paragraphs fall back to multi_cell for the process.
+_fast_path = True
+
+# (fontkey, size_pt, k) -> char widths in user units, filled lazily
+_width_tables = {}
+
+
+class _CharWidths(dict):
+    """Char -> width at one font size, computed from the font's glyph widths on first use."""
+
+    def __init__(self, cw, scale):
+        super().__init__()
+        self.cw = cw
+        self.scale = scale
+
+    def __missing__(self, char):
+        width = self[char] = self.cw[ord(char)] * self.scale
+        return width
+
+
+def width_table(pdf) -> _CharWidths:
+    """Glyph-width table for the PDF's current font and size, cached per process."""
+    font = pdf.current_font
+    key = (font.fontkey, pdf.font_size_pt, pdf.k)
+    table = _width_tables.get(key)
+    if table is None:
+        table = _width_tables[key] = _CharWidths(font.cw, pdf.font_size_pt * 0.001 / pdf.k)
+    return table
+
+
+def _text_width(table: _CharWidths, text: str) -> float:
+    return sum(map(table.__getitem__, text))
+
+
+def _hyphenate(word: str, word_width: float, table: _CharWidths, max_width: float) -> list:
+    """Split a word wider than a line into hyphenated pieces that each fit."""
+    pieces = []
+    hyphen_width = table[HYPHEN]
+    start, width = 0, 0.0
+    for i, char in enumerate(word):
+        char_width = table[char]
+        if width + char_width + hyphen_width > max_width and i > start:
+            pieces.append((word[start:i] + HYPHEN, width + hyphen_width))
+            start, width = i, 0.0
+        width += char_width
+    pieces.append((word[start:], width))
+    return pieces
+
+
+def wrap(pdf, text: str, max_width: float) -> list:
+    """
+    Greedy single-pass line breaking by summing word widths. Newlines start a
+    new paragraph, as in multi_cell. Returns a list of
+    (line, line_width, number_of_spaces, ends_paragraph).
+    """
+    return _wrap_text(width_table(pdf), text, max_width)
+
+
+def _wrap_text(table: _CharWidths, text: str, max_width: float) -> list:
+    lines = []
+    for paragraph in text.split("\n"):
+        paragraph_lines = _wrap_paragraph(table, paragraph.rstrip("\r"), max_width) or [("", 0.0, 0)]
+        lines.extend(line + (False,) for line in paragraph_lines[:-1])
+        lines.append(paragraph_lines[-1] + (True,))
+    return lines
+
+
+def _wrap_paragraph(table: _CharWidths, text: str, max_width: float) -> list:
+    space_width = table[" "]
+    lines = []
+    words, line_width = [], 0.0
+
+    for word in text.split(" "):
+        if not word:
+            continue
+        word_width = _text_width(table, word)
+        pieces = [(word, word_width)] if word_width <= max_width else _hyphenate(word, word_width, table, max_width)
+        for piece, piece_width in pieces:
+            if words and line_width + space_width + piece_width > max_width:
+                lines.append((" ".join(words), line_width, len(words) - 1))
+                words, line_width = [], 0.0
+            if words:
+                line_width += space_width
+            words.append(piece)
+            line_width += piece_width
+
+    if words:
+        lines.append((" ".join(words), line_width, len(words) - 1))
+    return lines
+
+
+def _emit_line(pdf, line: str, line_width: float, spaces: int, w: float, h: float, align: Align):
+    # Lines are already measured and broken, so render them directly instead
+    # of handing them to multi_cell for a second measure-and-wrap pass.
+    text_line = TextLine(
+        pdf._preload_font_styles(line, False),
+        text_width=line_width,
+        number_of_spaces=spaces,
+        align=align,
+        height=h,
+        max_width=w,
+    )
+    pdf._render_styled_text_line(text_line, h, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+
+def write_paragraph(pdf, text: str, w: float = 0, h: float = 8, align="J"):
+    """Lay out and emit one paragraph. Justified paragraphs leave their last line left-aligned."""
+    write_paragraphs(pdf, [text], w=w, h=h, align=align)
+
+
+def write_paragraphs(pdf, paragraphs: list, w: float = 0, h: float = 8, align="J", spacing: float = 0, prefix: str = ""):
+    """
+    Emit a batch of paragraphs (or bullets, via `prefix`) with `spacing`
+    after each. The box width and glyph-width table are resolved once, all
+    paragraphs are wrapped in one pass, then their lines are emitted.
+    """
+    global _fast_path
+    align = Align.coerce(align)
+    box_width = w or (pdf.w - pdf.r_margin - pdf.x)
+    texts = [f"{prefix}{text or ''}" for text in paragraphs]
+    if _fast_path:
+        table = width_table(pdf)
+        max_width = box_width - 2 * pdf.c_margin
+        laid_out = [_wrap_text(table, text, max_width) for text in texts]
+        if _emit_paragraphs(pdf, laid_out, box_width, h, align, spacing):
+            return
+        _fast_path = False
+    for text in texts:
+        pdf.multi_cell(box_width, h, text, align=align, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        if spacing:
+            pdf.ln(spacing)
+
+
+def _emit_paragraphs(pdf, laid_out: list, w: float, h: float, align: Align, spacing: float) -> bool:
+    """Emit wrapped paragraphs; False if fpdf2 internals failed on the first line, before anything was drawn."""
+    emitted = False
+    for lines in laid_out:
+        for line, line_width, spaces, ends_paragraph in lines:
+            line_align = Align.L if align == Align.J and ends_paragraph else align
+            try:
+                _emit_line(pdf, line, line_width, spaces, w, h, line_align)
+            except (AttributeError, TypeError) as e:
+                if emitted:
+                    raise
+                logging.warning(f"text_layout: fpdf2 internals changed ({e}); using multi_cell.")
+                return False
+            emitted = True
+        if spacing:
+            pdf.ln(spacing)
+    return True
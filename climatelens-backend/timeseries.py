@@ -0,0 +1,218 @@
+import json
+import numpy as np
+
+# EnviroTrust time-series payloads are parsed once, at the api_client
+# boundary, into column arrays: one index array (years or dates) and one
+# float64 array per metric. Caches, report bundles and chart workers then hold
+# and pass a few flat buffers instead of hundreds of row dicts.
+
+# Payload envelope key -> (index field, fields that are not metrics).
+# An index field of None means the payload is a mapping keyed by the index.
+FORMATS = {
+    "heat_wind_timeseries_data": ("year", ()),
+    "heat_wind_daily_data": ("date", ()),
+    "air_quality_timeseries": ("date", ()),
+    # Every row repeats the query coordinates; they are not a series
+    "wildfire_risk_timeseries_data": (None, ("latitude", "longitude", "year")),
+}
+
+ENDPOINT_FORMATS = {
+    "/api/heat-wind/timeseries": "heat_wind_timeseries_data",
+    "/api/heat-wind/daily": "heat_wind_daily_data",
+    "/api/airquality/timeseries-daily": "air_quality_timeseries",
+    "/api/wildfire/timeseries": "wildfire_risk_timeseries_data",
+}
+
+
+class TimeSeries:
+    """
+    Read-only column store for one payload. Slicing returns a TimeSeries of
+    NumPy views (no copy); indexing by name returns that metric's array.
+    """
+
+    __slots__ = ("key", "index", "columns")
+
+    def __init__(self, key: str, index: np.ndarray, columns: dict):
+        self.key = key
+        self.index = index
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return self.columns[item]
+        if not isinstance(item, slice):
+            raise TypeError("TimeSeries supports slices and metric names only")
+        return TimeSeries(self.key, self.index[item], {name: values[item] for name, values in self.columns.items()})
+
+    def __contains__(self, name) -> bool:
+        return name in self.columns
+
+    def __reduce__(self):
+        # Pickles as raw array buffers (e.g. to chart worker processes)
+        return TimeSeries, (self.key, self.index, self.columns)
+
+    def __repr__(self) -> str:
+        return f"TimeSeries({self.key!r}, {len(self)} rows, metrics={self.names})"
+
+    @property
+    def names(self) -> list:
+        return list(self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        return self.index.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def tail(self, n: int) -> "TimeSeries":
+        return self[-n:] if n > 0 else self[:0]
+
+    @property
+    def last_date(self):
+        """Latest index value (a numpy.datetime64 for daily series), or None if empty."""
+        return self.index[-1] if len(self) else None
+
+    def to_bytes(self) -> bytes:
+        """Compact binary form: a JSON header followed by the raw array buffers."""
+        header = json.dumps({
+            "key": self.key,
+            "rows": len(self),
+            "index": self.index.dtype.str,
+            "names": self.names,
+        }).encode("utf-8")
+        buffers = [np.ascontiguousarray(self.index)] + [np.ascontiguousarray(v, dtype=np.float64) for v in self.columns.values()]
+        return len(header).to_bytes(4, "little") + header + b"".join(buffer.tobytes() for buffer in buffers)
+
+    @classmethod
+    def from_bytes(cls, data) -> "TimeSeries":
+        """Inverse of to_bytes; the arrays are read-only views over `data`."""
+        size = int.from_bytes(data[:4], "little")
+        header = json.loads(bytes(data[4:4 + size]))
+        rows, offset = header["rows"], 4 + size
+        index = np.frombuffer(data, dtype=np.dtype(header["index"]), count=rows, offset=offset)
+        offset += index.nbytes
+        columns = {}
+        for name in header["names"]:
+            columns[name] = np.frombuffer(data, dtype=np.float64, count=rows, offset=offset)
+            offset += 8 * rows
+        return cls(header["key"], index, columns)
+
+    def _index_values(self) -> list:
+        if self.index.dtype.kind == "M":
+            return [None if np.isnat(d) else str(d) for d in self.index]
+        return self.index.tolist()
+
+    def to_payload(self) -> dict:
+        """The payload in its EnviroTrust JSON shape (metrics as floats, NaN as null)."""
+        index_field, _ = FORMATS[self.key]
+        columns = {name: [None if v != v else v for v in values.tolist()] for name, values in self.columns.items()}
+        rows = [{name: columns[name][i] for name in columns} for i in range(len(self))]
+        if index_field is None:
+            return {self.key: {str(label): row for label, row in zip(self._index_values(), rows)}}
+        return {self.key: [{index_field: label, **row} for label, row in zip(self._index_values(), rows)]}
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _metric_names(rows: list, skip) -> list:
+    """Metric names in order of first appearance."""
+    names = {}
+    for row in rows:
+        for name in row:
+            if name not in skip:
+                names[name] = None
+    return list(names)
+
+
+def _date(label) -> np.datetime64:
+    try:
+        return np.datetime64(str(label)[:10] if label else "NaT", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+def _index(field: str, labels: list) -> np.ndarray:
+    if field == "date":
+        days = [str(label)[:10] if label else "NaT" for label in labels]
+        try:
+            return np.array(days, dtype="datetime64[D]")
+        except ValueError:
+            # A malformed date only loses its own row, like a bad number in _float
+            return np.array([_date(label) for label in labels], dtype="datetime64[D]")
+    years = np.array([_float(label) for label in labels], dtype=np.float64)
+    return np.nan_to_num(years, nan=-1).astype(np.int64)
+
+
+def from_payload(key: str, payload):
+    """
+    Parse an EnviroTrust payload (or its bare rows) into a TimeSeries.
+    Returns None if it does not have the expected shape.
+    """
+    if isinstance(payload, TimeSeries):
+        return payload
+    index_field, skip = FORMATS[key]
+    data = payload.get(key) if isinstance(payload, dict) else payload
+    if index_field is None:
+        if not isinstance(data, dict):
+            return None
+        labels = list(data)
+        rows = [row if isinstance(row, dict) else {} for row in data.values()]
+        index = _index("year", labels)
+    else:
+        if not isinstance(data, list):
+            return None
+        rows = [row for row in data if isinstance(row, dict)]
+        index = _index(index_field, [row.get(index_field) for row in rows])
+        skip = (*skip, index_field)
+
+    columns = {
+        name: np.fromiter((_float(row.get(name)) for row in rows), dtype=np.float64, count=len(rows))
+        for name in _metric_names(rows, skip)
+    }
+    # NaT compares false with every date, so undated rows force a sort (argsort puts them last)
+    undated = index.dtype.kind == "M" and np.isnat(index).any()
+    if len(index) and (undated or np.any(index[1:] < index[:-1])):
+        order = np.argsort(index, kind="stable")
+        index, columns = index[order], {name: values[order] for name, values in columns.items()}
+    return TimeSeries(key, index, columns)
+
+
+def parse(path: str, payload):
+    """Parse a response from a time-series endpoint; other responses pass through unchanged."""
+    key = ENDPOINT_FORMATS.get(path)
+    if key is None:
+        return payload
+    series = from_payload(key, payload)
+    return payload if series is None else series
+
+
+def _dated(series: TimeSeries) -> TimeSeries:
+    keep = ~np.isnat(series.index)
+    if keep.all():
+        return series
+    return TimeSeries(series.key, series.index[keep], {name: values[keep] for name, values in series.columns.items()})
+
+
+def merge(old: TimeSeries, new: TimeSeries) -> TimeSeries:
+    """
+    Union of two series by index value. Where both have a row, values from
+    `new` win; metrics missing from one side are NaN there.
+    """
+    if old.index.dtype.kind == "M":
+        # Rows without a date cannot be placed on the merged axis
+        old, new = _dated(old), _dated(new)
+    index = np.union1d(old.index, new.index)
+    columns = {}
+    for name in dict.fromkeys(old.names + new.names):
+        values = np.full(len(index), np.nan)
+        for side in (old, new):
+            if name in side:
+                values[np.searchsorted(index, side.index)] = side[name]
+        columns[name] = values
+    return TimeSeries(new.key, index, columns)
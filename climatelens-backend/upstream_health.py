@@ -0,0 +1,185 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+# Per-endpoint upstream health: recent latencies drive adaptive timeouts and
+# hedged (duplicate) requests, and a circuit breaker fails calls fast while an
+# endpoint keeps failing, instead of letting every report wait out a timeout.
+LATENCY_WINDOW = int(os.getenv("UPSTREAM_LATENCY_WINDOW", "200"))
+MIN_SAMPLES = int(os.getenv("UPSTREAM_MIN_SAMPLES", "20"))
+# Adaptive timeout: p99 x multiplier, clamped to [UPSTREAM_MIN_TIMEOUT, static endpoint timeout]
+TIMEOUT_MULTIPLIER = float(os.getenv("UPSTREAM_TIMEOUT_MULTIPLIER", "3"))
+MIN_TIMEOUT = float(os.getenv("UPSTREAM_MIN_TIMEOUT", "2"))
+# A second request is sent once the first has taken longer than this percentile (0 disables hedging)
+HEDGE_PERCENTILE = float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", "95"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies for one endpoint (a timed-out call counts as its timeout)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float):
+        """Latency at percentile `p` (0..100), or None until enough samples are in."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. After `cooldown` seconds one
+    probe call is let through (half-open); its outcome closes or reopens it.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self):
+        """A call ended without a verdict (cancelled); let another probe through."""
+        self._probing = False
+
+    def failure(self) -> bool:
+        """Record a failed call; returns True if this opened the circuit."""
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+
+class UpstreamHealth:
+    """Latency trackers and circuit breakers for every endpoint of one upstream."""
+
+    def __init__(self, upstream: str, hedge_percentile: float = HEDGE_PERCENTILE):
+        self.upstream = upstream
+        self.hedge_percentile = hedge_percentile
+        self._latency = {}
+        self._breakers = {}
+        self._hedges = {}
+
+    def latency(self, endpoint: str) -> LatencyTracker:
+        tracker = self._latency.get(endpoint)
+        if tracker is None:
+            tracker = self._latency[endpoint] = LatencyTracker()
+        return tracker
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker()
+        return breaker
+
+    def check(self, endpoint: str):
+        """Raise CircuitOpenError if calls to `endpoint` should fail fast."""
+        if not self.breaker(endpoint).allow():
+            raise CircuitOpenError(f"{self.upstream} {endpoint} is failing; circuit open")
+
+    def record_success(self, endpoint: str):
+        self.breaker(endpoint).success()
+
+    def record_failure(self, endpoint: str):
+        if self.breaker(endpoint).failure():
+            logging.warning(f"Circuit opened for {self.upstream} {endpoint}; failing fast for {BREAKER_COOLDOWN:.0f}s.")
+
+    def timeout(self, endpoint: str, ceiling: float) -> float:
+        p99 = self.latency(endpoint).percentile(99)
+        # A half-open probe gets the full ceiling, so a slower-but-recovered endpoint can close the circuit
+        if p99 is None or self.breaker(endpoint).state != CLOSED:
+            return ceiling
+        return min(ceiling, max(MIN_TIMEOUT, p99 * TIMEOUT_MULTIPLIER))
+
+    def hedge_delay(self, endpoint: str):
+        # A half-open circuit lets exactly one probe through; never duplicate it
+        if self.hedge_percentile <= 0 or self.breaker(endpoint).state != CLOSED:
+            return None
+        return self.latency(endpoint).percentile(self.hedge_percentile)
+
+    async def hedged(self, endpoint: str, call, timeouts: tuple = ()):
+        """
+        Await `call()`; if it is still running after the endpoint's hedge delay,
+        start a second `call()` and return whichever succeeds first.
+
+        The latency the caller waited is recorded once: for a success, and for
+        a failure of one of the `timeouts` exception types (a timed-out call
+        took at least its timeout, and keeping it lets timeouts grow back).
+        """
+        started = time.monotonic()
+        delay = self.hedge_delay(endpoint)
+        pending = {asyncio.ensure_future(call())}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self._hedges[endpoint] = self._hedges.get(endpoint, 0) + 1
+                    pending.add(asyncio.ensure_future(call()))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latency(endpoint).observe(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            if isinstance(error, timeouts):
+                self.latency(endpoint).observe(time.monotonic() - started)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        endpoints = sorted(set(self._latency) | set(self._breakers))
+        result = {}
+        for endpoint in endpoints:
+            tracker, breaker = self.latency(endpoint), self.breaker(endpoint)
+            p95, p99 = tracker.percentile(95), tracker.percentile(99)
+            result[endpoint] = {
+                "state": breaker.state,
+                "consecutive_failures": breaker.failures,
+                "rejected": breaker.rejected,
+                "hedged": self._hedges.get(endpoint, 0),
+                "p95_ms": None if p95 is None else round(p95 * 1000, 1),
+                "p99_ms": None if p99 is None else round(p99 * 1000, 1),
+            }
+        return result